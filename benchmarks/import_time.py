@@ -0,0 +1,44 @@
+"""Measure the start-up cost of the command line utility.
+
+Run with ``python benchmarks/import_time.py``. Reports the time taken to
+import the command line module and parse arguments, and the time taken to
+additionally import the driver, as the median of several fresh interpreters.
+"""
+import statistics
+import subprocess
+import sys
+
+RUNS = 15
+
+STARTUP = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "from epevermodbus import command_line\n"
+    "command_line.build_parser().parse_args(command_line.translate_legacy_arguments(['--json']))\n"
+    "{extra}"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def measure(extra=""):
+    timings = []
+    for _ in range(RUNS):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP.format(extra=extra)],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        timings.append(float(output))
+    return statistics.median(timings)
+
+
+def main():
+    cli = measure()
+    driver = measure("import epevermodbus.driver\n")
+    print(f"Argument parsing: {cli * 1000:.1f} ms")
+    print(f"Argument parsing and driver import: {driver * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
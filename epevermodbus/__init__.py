@@ -1,2 +1,18 @@
-from epevermodbus.driver import EpeverChargeController
+from epevermodbus.aggregators import (
+    DerivedMetrics,
+    EnergyIntegrator,
+    ExponentialMean,
+    SlidingExtremum,
+    WindowMean,
+)
 from epevermodbus.extract_bits import extract_bits
+
+
+def __getattr__(name):
+    # The driver pulls in minimalmodbus, pyserial and retrying, so it is only
+    # imported once it is actually used.
+    if name == "EpeverChargeController":
+        from epevermodbus.driver import EpeverChargeController
+
+        return EpeverChargeController
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,203 @@
+"""Streaming aggregators for values derived from successive readings.
+
+Each aggregator is fed one sample at a time and keeps a bounded amount of
+state, so they can run indefinitely next to a polling loop. Timestamps are
+seconds, for example from ``time.time()`` or ``time.monotonic()``.
+"""
+import collections
+import math
+import time
+
+
+class EnergyIntegrator:
+    """Integrates power in watts into energy in watt hours (trapezoidal rule)
+
+    Args:
+        * max_gap (float): samples further apart than this many seconds are
+          not integrated across, so that a polling outage does not invent
+          energy (default is no limit)
+    """
+
+    def __init__(self, max_gap=None):
+        self.max_gap = max_gap
+        self.energy = 0.0
+        self._last_timestamp = None
+        self._last_power = None
+
+    def update(self, timestamp, power):
+        """Add a power sample and return the energy so far in Wh"""
+        if self._last_timestamp is not None:
+            elapsed = timestamp - self._last_timestamp
+            if elapsed > 0 and (self.max_gap is None or elapsed <= self.max_gap):
+                self.energy += (self._last_power + power) / 2 * elapsed / 3600
+        self._last_timestamp = timestamp
+        self._last_power = power
+        return self.energy
+
+    def reset(self):
+        """Start counting from zero again, keeping the last sample"""
+        self.energy = 0.0
+
+
+class ExponentialMean:
+    """Exponentially weighted mean with a time constant in seconds
+
+    Samples are weighted by the time elapsed since the previous one, so an
+    irregular polling interval does not skew the mean.
+    """
+
+    def __init__(self, time_constant):
+        self.time_constant = time_constant
+        self.mean = None
+        self._last_timestamp = None
+
+    def update(self, timestamp, value):
+        """Add a sample and return the current mean"""
+        if self.mean is None:
+            self.mean = value
+        else:
+            elapsed = max(timestamp - self._last_timestamp, 0)
+            alpha = 1 - math.exp(-elapsed / self.time_constant)
+            self.mean += alpha * (value - self.mean)
+        self._last_timestamp = timestamp
+        return self.mean
+
+
+class WindowMean:
+    """Mean over consecutive fixed windows, for example every 5 minutes
+
+    Windows are aligned to multiples of *window* seconds. ``update`` returns
+    the mean of the window that the sample closed, or None while a window is
+    still open. The completed mean is also kept in ``last_mean``.
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self.last_mean = None
+        self.last_window_start = None
+        self._window_start = None
+        self._total = 0.0
+        self._count = 0
+
+    def update(self, timestamp, value):
+        """Add a sample and return the mean of a window it completed"""
+        window_start = timestamp - timestamp % self.window
+        completed = None
+
+        if self._window_start is not None and window_start != self._window_start:
+            if self._count:
+                completed = self._total / self._count
+                self.last_mean = completed
+                self.last_window_start = self._window_start
+            self._total = 0.0
+            self._count = 0
+
+        self._window_start = window_start
+        self._total += value
+        self._count += 1
+        return completed
+
+    @property
+    def mean(self):
+        """Mean of the window in progress"""
+        return self._total / self._count if self._count else None
+
+
+class SlidingExtremum:
+    """Minimum or maximum over the last *window* seconds
+
+    Uses a monotonic deque, so each sample is added and evicted at most once
+    and memory is bounded by the number of samples in one window.
+    """
+
+    def __init__(self, window, maximum=True):
+        if window <= 0:
+            raise ValueError(f"window must be positive, not {window}")
+        self.window = window
+        self.maximum = maximum
+        self._samples = collections.deque()
+
+    def update(self, timestamp, value):
+        """Add a sample and return the extremum of the window"""
+        samples = self._samples
+        if self.maximum:
+            while samples and samples[-1][1] <= value:
+                samples.pop()
+        else:
+            while samples and samples[-1][1] >= value:
+                samples.pop()
+        samples.append((timestamp, value))
+
+        while samples[0][0] <= timestamp - self.window:
+            samples.popleft()
+        return samples[0][1]
+
+    @property
+    def value(self):
+        """Extremum of the window as of the latest sample"""
+        return self._samples[0][1] if self._samples else None
+
+
+class DerivedMetrics:
+    """Energy, averages and peaks derived from successive readings
+
+    Feed it the dicts produced by reading fields by name, for example
+    ``{"solar_power": 120.5, "load_power": 10.2, "battery_power": 110.3}``.
+    Fields missing from a reading are skipped.
+
+    Args:
+        * average_window (float): seconds per fixed-window mean (default 300)
+        * time_constant (float): seconds for the exponential means (default 60)
+        * peak_window (float): seconds for the sliding minimum and maximum
+          (default 3600)
+        * max_gap (float): longest gap in seconds to integrate energy across
+    """
+
+    power_fields = ("solar_power", "load_power", "battery_power")
+
+    def __init__(
+        self, average_window=300, time_constant=60, peak_window=3600, max_gap=None
+    ):
+        self.energy = {name: EnergyIntegrator(max_gap) for name in self.power_fields}
+        self.exponential_mean = {
+            name: ExponentialMean(time_constant) for name in self.power_fields
+        }
+        self.window_mean = {
+            name: WindowMean(average_window) for name in self.power_fields
+        }
+        self.maximum = {
+            name: SlidingExtremum(peak_window) for name in self.power_fields
+        }
+        self.minimum = {
+            name: SlidingExtremum(peak_window, maximum=False)
+            for name in self.power_fields
+        }
+
+    def update(self, reading, timestamp=None):
+        """Add a reading and return the derived metrics"""
+        if timestamp is None:
+            timestamp = time.time()
+
+        for name in self.power_fields:
+            value = reading.get(name)
+            if value is None:
+                continue
+            self.energy[name].update(timestamp, value)
+            self.exponential_mean[name].update(timestamp, value)
+            self.window_mean[name].update(timestamp, value)
+            self.maximum[name].update(timestamp, value)
+            self.minimum[name].update(timestamp, value)
+
+        return self.get_metrics()
+
+    def get_metrics(self):
+        """Current derived metrics keyed like the readings they come from"""
+        metrics = {}
+        for name in self.power_fields:
+            prefix = name[: -len("_power")]
+            metrics[f"{prefix}_energy"] = self.energy[name].energy
+            metrics[f"{name}_exponential_mean"] = self.exponential_mean[name].mean
+            metrics[f"{name}_window_mean"] = self.window_mean[name].last_mean
+            metrics[f"{name}_maximum"] = self.maximum[name].value
+            metrics[f"{name}_minimum"] = self.minimum[name].value
+        return metrics
@@ -0,0 +1,106 @@
+import threading
+import time
+
+from epevermodbus.driver import REGISTER_BLOCKS, RegisterSnapshot, blocks_for_fields
+from epevermodbus.fields import FIELD_NAMES
+
+
+class RegisterCache:
+    """Freshness-bounded cache of register blocks shared by many readers
+
+    Readers that need stale blocks while another reader is on the bus wait
+    for it and add their blocks to the next read, so concurrent requests
+    coalesce into one read of each block however many readers there are.
+
+    Args:
+        * controller (EpeverChargeController): the only user of the bus
+        * max_age (float): seconds a block read stays fresh (default 1)
+        * coalesce_window (float): seconds the reader waits for other
+          requests to join before going on the bus (default 0.01)
+    """
+
+    def __init__(self, controller, max_age=1.0, coalesce_window=0.01):
+        self.controller = controller
+        self.max_age = max_age
+        self.coalesce_window = coalesce_window
+        self.registers = {}
+        self.read_times = {}
+        self.wall_times = {}
+        self._pending = set()
+        self._reading = False
+        self._condition = threading.Condition()
+
+    def _stale_blocks(self, blocks, now):
+        return {
+            block
+            for block in blocks
+            if now - self.read_times.get(block, float("-inf")) > self.max_age
+        }
+
+    def get_registers(self, blocks=REGISTER_BLOCKS):
+        """Returns register values of the blocks, reading stale blocks first"""
+        with self._condition:
+            while True:
+                stale = self._stale_blocks(blocks, time.monotonic())
+                if not stale:
+                    return dict(self.registers)
+                self._pending |= stale
+                if not self._reading:
+                    break
+                self._condition.wait()
+            self._reading = True
+
+        try:
+            if self.coalesce_window:
+                time.sleep(self.coalesce_window)
+            with self._condition:
+                pending, self._pending = sorted(self._pending), set()
+            read_time = time.monotonic()
+            wall_time = time.time()
+            registers = self.controller.read_register_blocks(pending)
+        except BaseException:
+            with self._condition:
+                self._reading = False
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self.registers.update(registers)
+            for block in pending:
+                self.read_times[block] = read_time
+                self.wall_times[block] = wall_time
+            self._reading = False
+            self._condition.notify_all()
+            return dict(self.registers)
+
+    def get_snapshot(self, names=FIELD_NAMES):
+        """The named fields decoded from fresh registers, with a status each
+
+        See EpeverChargeController.get_snapshot. Fields whose registers the
+        device does not have are "unsupported".
+        """
+        registers = self.get_registers(blocks_for_fields(names))
+        return RegisterSnapshot(registers, self.controller.address).get_readings(
+            names, dict(self.wall_times)
+        )
+
+    def get_fields(self, names=FIELD_NAMES):
+        """Returns the named fields decoded from fresh registers
+
+        Fields that could not be decoded, such as registers the device does
+        not have, are left out.
+        """
+        return {
+            name: reading["value"]
+            for name, reading in self.get_snapshot(names).items()
+            if reading["status"] == "ok"
+        }
+
+    def invalidate(self, blocks=None):
+        """Marks blocks, all of them by default, as needing a fresh read"""
+        with self._condition:
+            if blocks is None:
+                self.read_times.clear()
+            else:
+                for block in blocks:
+                    self.read_times.pop(block, None)
@@ -0,0 +1,110 @@
+"""Probing which registers a device supports, persisted per model and firmware
+
+Models and firmware versions differ in which registers they have, and
+reading a missing one fails the whole block with an illegal address
+exception. probe_unsupported_registers bisects the failing blocks down to
+the missing registers once; apply_capabilities stores the result keyed by
+model and firmware so that later block reads go around the holes.
+"""
+import json
+import os
+
+import minimalmodbus
+
+from epevermodbus.driver import REGISTER_BLOCKS
+
+DEFAULT_PATH = os.path.join(
+    os.path.expanduser("~"), ".cache", "epevermodbus", "capabilities.json"
+)
+
+
+def _read(controller, functioncode, address, count):
+    if functioncode in (1, 2):
+        return controller.retriable_read_bits(address, count, functioncode)
+    return controller.retriable_read_registers(address, count, functioncode)
+
+
+def _find_unsupported(controller, functioncode, address, count):
+    try:
+        _read(controller, functioncode, address, count)
+        return []
+    except minimalmodbus.IllegalRequestError:
+        if count == 1:
+            return [(functioncode, address)]
+    half = count // 2
+    return _find_unsupported(
+        controller, functioncode, address, half
+    ) + _find_unsupported(controller, functioncode, address + half, count - half)
+
+
+def probe_unsupported_registers(controller, blocks=REGISTER_BLOCKS):
+    """The (functioncode, address) of every register in *blocks* the device rejects
+
+    Blocks that read fine cost one transaction; a failing block is split in
+    half until the illegal addresses are found.
+    """
+    unsupported = []
+    for functioncode, address, count in blocks:
+        unsupported.extend(_find_unsupported(controller, functioncode, address, count))
+    return set(unsupported)
+
+
+def device_key(controller):
+    """Identifies the model and firmware of the device
+
+    Uses the device identification when the device supports it, and the
+    rated data otherwise.
+    """
+    try:
+        identification = controller.get_device_identification()
+        return "{vendor_name}/{product_code}/{revision}".format(
+            **{"vendor_name": "", "product_code": "", "revision": "", **identification}
+        )
+    except (IOError, ValueError, IndexError):
+        rated = controller.get_rated_data()
+        return "rated/{battery_rated_voltage}V/{rated_charging_current}A/{rated_charging_mode}".format(
+            **rated
+        )
+
+
+def load_capabilities(path=DEFAULT_PATH):
+    """Unsupported registers by device key, as stored at *path*"""
+    try:
+        with open(path) as file:
+            stored = json.load(file)
+    except FileNotFoundError:
+        return {}
+    return {
+        key: {tuple(register) for register in registers}
+        for key, registers in stored.items()
+    }
+
+
+def save_capabilities(capabilities, path=DEFAULT_PATH):
+    """Stores unsupported registers by device key at *path*"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w") as file:
+        json.dump(
+            {
+                key: sorted(list(register) for register in registers)
+                for key, registers in capabilities.items()
+            },
+            file,
+            indent=2,
+        )
+
+
+def apply_capabilities(controller, path=DEFAULT_PATH):
+    """Sets the controller's unsupported_registers, probing the device if unknown
+
+    Returns the device key the capabilities are stored under.
+    """
+    capabilities = load_capabilities(path)
+    key = device_key(controller)
+    if key not in capabilities:
+        capabilities[key] = probe_unsupported_registers(controller)
+        save_capabilities(capabilities, path)
+    controller.unsupported_registers = frozenset(capabilities[key])
+    return key
@@ -1,376 +1,553 @@
 import argparse
-import datetime
-import json
+import sys
 
-from epevermodbus.driver import EpeverChargeController
+from epevermodbus.fields import (
+    BATTERY_PARAMETER_FIELDS,
+    FIELD_NAMES,
+    FIELDS,
+    REAL_TIME_FIELDS,
+    SETTING_NAMES,
+    SETTINGS,
+)
 
+# Heavy modules (minimalmodbus, serial, retrying, json, datetime) are imported
+# by the subcommand that needs them so that start-up stays cheap.
 
-def main():
-    parser = argparse.ArgumentParser()
+COMMANDS = ("read", "set", "watch", "scan", "serve", "publish", "gateway", "record")
+
+# Options of the command line utility before it was split into subcommands
+LEGACY_SET_OPTIONS = {
+    "--set-time": "time",
+    "--set-battery-capacity": "battery_capacity",
+    "--set-battery-temp-comp-coeff": "temperature_compensation_coefficient",
+}
+LEGACY_SET_OPTIONS.update(
+    {
+        "--set-" + name.replace("_", "-"): name
+        for name in SETTING_NAMES
+        if name not in LEGACY_SET_OPTIONS.values()
+    }
+)
+
+
+def add_connection_arguments(parser, offline=False):
+    """Adds the serial port options, and with *offline* --from-file and --replay"""
     parser.add_argument(
         "--portname", help="Port name for example /dev/ttyUSB0", default="/dev/ttyUSB0"
     )
     parser.add_argument(
         "--slaveaddress", help="Slave address 1-247", default=1, type=int
     )
-
     parser.add_argument(
         "--baudrate", help="Baudrate to communicate with controller (default is 115200)", default=115200, type=int
     )
-
-    parser.add_argument("--json", help="Make a json output", action="store_true")
-    parser.add_argument("--set-time", help="Set the RTC of the MPPT and exit", action="store_true")
-    parser.add_argument("--set-battery-capacity", help="Set the battery capacity in Ah an exit", type=int)
     parser.add_argument(
-        "--set-battery-temp-comp-coeff",
-        help="Sets the batteries temperature compensation coefficient. Coefficient is in mV/°C/Cell without the sign",
-        type=float,
+        "--capabilities",
+        help="File of the registers each model supports, probed on first use "
+        "so reads skip missing registers",
+        metavar="PATH",
     )
     parser.add_argument(
-        "--set-over-voltage-disconnect-voltage",
-        help="Set the over-voltage disconnect voltage and exit",
-        type=float
+        "--builtin-rtu",
+        help="Read through the built-in RTU transport, "
+        "which uses less CPU than minimalmodbus",
+        action="store_true",
     )
-    parser.add_argument(
-        "--set-over-voltage-reconnect-voltage",
-        help="Set the over-voltage reconnect voltage and exit",
-        type=float
+    if not offline:
+        return
+    recording = parser.add_mutually_exclusive_group()
+    recording.add_argument(
+        "--from-file",
+        help="Serve the last snapshot of a recording instead of reading a device",
+        metavar="PATH",
     )
-    parser.add_argument(
-        "--set-charging-limit-voltage",
-        help="Set the charging voltage limit and exit",
-        type=float
+    recording.add_argument(
+        "--replay",
+        help="Serve the snapshots of a recording one reading at a time "
+        "instead of reading a device",
+        metavar="PATH",
     )
-    parser.add_argument(
-        "--set-discharging-limit-voltage",
-        help="Set the discharging limit voltage and exit",
-        type=float
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="epevermodbus")
+    subparsers = parser.add_subparsers(
+        dest="command", metavar="{read,set,watch,scan,serve,publish,gateway,record}"
     )
-    parser.add_argument(
-        "--set-boost-charging-voltage",
-        help="Set the boost charging voltage and exit",
-        type=float
+
+    read_parser = subparsers.add_parser(
+        "read", help="Read real time data and battery parameters"
     )
-    parser.add_argument(
-        "--set-boost-reconnect-charging-voltage",
-        help="Set the boost reconnect charging voltage and exit",
-        type=float
+    add_connection_arguments(read_parser, offline=True)
+    read_parser.add_argument("--json", help="Make a json output", action="store_true")
+    read_parser.add_argument(
+        "fields", nargs="*", metavar="FIELD", help="Fields to read (default is all)"
     )
-    parser.add_argument(
-        "--set-equalize-charging-voltage",
-        help="Set the equalize charging voltage and exit",
-        type=float
+
+    set_parser = subparsers.add_parser("set", help="Change settings and exit")
+    add_connection_arguments(set_parser)
+    set_parser.add_argument(
+        "settings",
+        nargs="+",
+        metavar="NAME=VALUE",
+        help=f"Setting to change, one of: {', '.join(SETTING_NAMES)}. "
+        "A bare 'time' sets the RTC to the current time",
     )
-    parser.add_argument(
-        "--set-float-charging-voltage",
-        help="Set the float charging voltage and exit",
-        type=float
+
+    watch_parser = subparsers.add_parser("watch", help="Read fields repeatedly")
+    add_connection_arguments(watch_parser, offline=True)
+    watch_parser.add_argument(
+        "--json", help="Make a json output, one line per reading", action="store_true"
     )
-    parser.add_argument(
-        "--set-low-voltage-disconnect-voltage",
-        help="Set the low-voltage disconnect voltage and exit",
-        type=float
+    watch_parser.add_argument(
+        "--interval",
+        help="Seconds between readings (default is 5)",
+        default=5,
+        type=float,
     )
-    parser.add_argument(
-        "--set-low-voltage-reconnect-voltage",
-        help="Set the low voltage reconnect voltage and exit",
-        type=float
+    watch_parser.add_argument("--count", help="Stop after this many readings", type=int)
+    watch_parser.add_argument(
+        "fields", nargs="*", metavar="FIELD", help="Fields to read (default is all)"
     )
-    parser.add_argument(
-        "--set-under-voltage-warning-voltage",
-        help="Set the under-voltage warning voltage and exit",
-        type=float
+
+    scan_parser = subparsers.add_parser(
+        "scan", help="Find controllers, their slave addresses and baud rates"
     )
-    parser.add_argument(
-        "--set-under-voltage-recover-voltage",
-        help="Set the under-voltage recover voltage and exit",
-        type=float
+    scan_parser.add_argument(
+        "--portname",
+        help="Port to scan, can be repeated "
+        "(default is every /dev/ttyUSB* and /dev/ttyXRUSB*)",
+        action="append",
+    )
+    scan_parser.add_argument(
+        "--baudrate",
+        help="Baudrate to try, can be repeated "
+        "(default is 115200, 9600, 19200, 38400 and 57600)",
+        action="append",
+        type=int,
+    )
+    scan_parser.add_argument(
+        "--first", help="First slave address to probe", default=1, type=int
+    )
+    scan_parser.add_argument(
+        "--last", help="Last slave address to probe", default=247, type=int
+    )
+    scan_parser.add_argument(
+        "--timeout",
+        help="Probe timeout in seconds (default is 0.1)",
+        default=0.1,
+        type=float,
+    )
+    sweep = scan_parser.add_mutually_exclusive_group()
+    sweep.add_argument(
+        "--max-misses",
+        help="Once a controller is found, stop sweeping after this many "
+        "addresses in a row do not answer (default is 16)",
+        default=16,
+        type=int,
     )
-    args = parser.parse_args()
+    sweep.add_argument(
+        "--full-sweep",
+        help="Probe every address, even long after the last controller found",
+        action="store_true",
+    )
+    scan_parser.add_argument("--json", help="Make a json output", action="store_true")
 
-    controller = EpeverChargeController(args.portname, args.slaveaddress, args.baudrate)
+    serve_parser = subparsers.add_parser(
+        "serve", help="Serve readings as JSON over HTTP"
+    )
+    add_connection_arguments(serve_parser)
+    serve_parser.add_argument(
+        "--host",
+        help="Address to listen on (default is 127.0.0.1)",
+        default="127.0.0.1",
+    )
+    serve_parser.add_argument(
+        "--port", help="Port to listen on (default is 8080)", default=8080, type=int
+    )
+    serve_parser.add_argument(
+        "--max-age",
+        help="Seconds a reading may be served from the cache (default is 1)",
+        default=1.0,
+        type=float,
+    )
 
-    if args.set_time:
-        print(f"Old RTC value: {controller.get_rtc()}")
-        controller.set_rtc(datetime.datetime.now())
-        print(f"New RTC value: {controller.get_rtc()}")
+    publish_parser = subparsers.add_parser(
+        "publish", help="Publish raw registers to shared memory"
+    )
+    add_connection_arguments(publish_parser)
+    publish_parser.add_argument(
+        "--path",
+        help="File to publish to (default is /dev/shm/epevermodbus)",
+        default="/dev/shm/epevermodbus",
+    )
+    publish_parser.add_argument(
+        "--interval",
+        help="Seconds between readings (default is 1)",
+        default=1.0,
+        type=float,
+    )
 
-    if args.set_battery_capacity:
-        print(f"Old capacity: {controller.get_battery_capacity()}AH")
-        controller.set_battery_capacity(args.set_battery_capacity)
-        print(f"New capacity: {controller.get_battery_capacity()}AH")
+    gateway_parser = subparsers.add_parser(
+        "gateway", help="Serve the controller to Modbus TCP clients"
+    )
+    add_connection_arguments(gateway_parser)
+    gateway_parser.add_argument(
+        "--host",
+        help="Address to listen on (default is 127.0.0.1)",
+        default="127.0.0.1",
+    )
+    gateway_parser.add_argument(
+        "--port", help="Port to listen on (default is 5020)", default=5020, type=int
+    )
+    gateway_parser.add_argument(
+        "--interval",
+        help="Seconds between polls (default is 1)",
+        default=1.0,
+        type=float,
+    )
+    gateway_parser.add_argument(
+        "--max-age",
+        help="Seconds a register is served after its last successful poll "
+        "(default is five intervals)",
+        type=float,
+    )
 
-    if args.set_battery_temp_comp_coeff:
-        print(
-            "Old Temperature compensation coefficient: "
-            f"{controller.get_temperature_compensation_coefficient()}mV/°C/Cell"
-        )
-        controller.set_temperature_compensation_coefficient(args.set_battery_temp_comp_coeff)
-        print(
-            "New Temperature compensation coefficient: "
-            f"{controller.get_temperature_compensation_coefficient()}mV/°C/Cell"
-        )
+    record_parser = subparsers.add_parser(
+        "record", help="Record raw registers for --from-file and --replay"
+    )
+    add_connection_arguments(record_parser)
+    record_parser.add_argument(
+        "--output", help="File to append snapshots to", required=True
+    )
+    record_parser.add_argument(
+        "--interval",
+        help="Seconds between snapshots (default is 1)",
+        default=1.0,
+        type=float,
+    )
+    record_parser.add_argument(
+        "--count", help="Stop after this many snapshots", type=int
+    )
 
-    if args.set_over_voltage_disconnect_voltage:
-        print(f"Old over-voltage disconnect voltage: {controller.get_over_voltage_disconnect_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-                over_voltage_disconnect_voltage=args.set_over_voltage_disconnect_voltage
-        )
-        print(f"New over-voltage disconnect voltage: {controller.get_over_voltage_disconnect_voltage()}V")
+    return parser
 
-    if args.set_over_voltage_reconnect_voltage:
-        print(f"Old over-voltage reconnect voltage: {controller.get_over_voltage_reconnect_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            over_voltage_reconnect_voltage=args.set_over_voltage_reconnect_voltage
-        )
-        print(f"New over-voltage reconnect voltage: {controller.get_over_voltage_reconnect_voltage()}V")
 
-    if args.set_charging_limit_voltage:
-        print(f"Old charging limit voltage: {controller.get_charging_limit_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            charging_limit_voltage=args.set_charging_limit_voltage
-        )
-        print(f"New charging limit voltage: {controller.get_charging_limit_voltage()}V")
+def translate_legacy_arguments(argv):
+    """Map the pre-subcommand invocation onto the subcommands
 
-    if args.set_discharging_limit_voltage:
-        print(f"Old discharging limit voltage: {controller.get_discharging_limit_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            discharging_limit_voltage=args.set_discharging_limit_voltage
-        )
-        print(f"New discharging limit voltage: {controller.get_discharging_limit_voltage()}V")
+    ``epevermodbus --json`` becomes ``epevermodbus read --json`` and
+    ``epevermodbus --set-battery-capacity 40`` becomes
+    ``epevermodbus set battery_capacity=40``. ``--json`` only affected
+    reads, so it is dropped from set invocations, which used to ignore it.
+    """
+    if argv and (argv[0] in COMMANDS or argv[0] in ("-h", "--help")):
+        return argv
 
-    if args.set_boost_charging_voltage:
-        print(f"Old boost charging voltage: {controller.get_boost_charging_voltage()}V")
-        controller.set_battery_voltage_control_registers(boost_charging_voltage=args.set_boost_charging_voltage)
-        print(f"New boost charging voltage: {controller.get_boost_charging_voltage()}V")
+    settings = []
+    remaining = []
+    arguments = iter(argv)
+    for argument in arguments:
+        option, _, value = argument.partition("=")
+        if option not in LEGACY_SET_OPTIONS:
+            remaining.append(argument)
+        elif option == "--set-time":
+            settings.append("time")
+        else:
+            settings.append(
+                f"{LEGACY_SET_OPTIONS[option]}={value or next(arguments, '')}"
+            )
 
-    if args.set_boost_reconnect_charging_voltage:
-        print(f"Old boost reconnect charging voltage: {controller.get_boost_reconnect_charging_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            boost_reconnect_charging_voltage=args.set_boost_reconnect_charging_voltage
-        )
-        print(f"New boost reconnect charging voltage: {controller.get_boost_reconnect_charging_voltage()}V")
+    if settings:
+        remaining = [argument for argument in remaining if argument != "--json"]
+        return ["set"] + remaining + settings
+    return ["read"] + remaining
 
-    if args.set_equalize_charging_voltage:
-        print(f"Old equalize charging voltage: {controller.get_equalize_charging_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            equalize_charging_voltage=args.set_equalize_charging_voltage
-        )
-        print(f"New equalize charging voltage: {controller.get_equalize_charging_voltage()}V")
 
-    if args.set_float_charging_voltage:
-        print(f"Old float charging voltage: {controller.get_float_charging_voltage()}V")
-        controller.set_battery_voltage_control_registers(float_charging_voltage=args.set_float_charging_voltage)
-        print(f"New float charging voltage: {controller.get_float_charging_voltage()}V")
+def create_controller(args):
+    if getattr(args, "from_file", None) or getattr(args, "replay", None):
+        from epevermodbus.recording import ReplayController, load_recording
 
-    if args.set_low_voltage_disconnect_voltage:
-        print(f"Old low-voltage disconnect voltage: {controller.get_low_voltage_disconnect_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            low_voltage_disconnect_voltage=args.set_low_voltage_disconnect_voltage
-        )
-        print(f"New low-voltage disconnect voltage: {controller.get_low_voltage_disconnect_voltage()}V")
+        if args.from_file:
+            return ReplayController(load_recording(args.from_file)[-1:], loop=True)
+        return ReplayController(load_recording(args.replay))
 
-    if args.set_low_voltage_reconnect_voltage:
-        print(f"Old low-voltage reconnect voltage: {controller.get_low_voltage_reconnect_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            low_voltage_reconnect_voltage=args.set_low_voltage_reconnect_voltage
-        )
-        print(f"New low-voltage reconnect voltage: {controller.get_low_voltage_reconnect_voltage()}V")
+    from epevermodbus.driver import EpeverChargeController
 
-    if args.set_under_voltage_warning_voltage:
-        print(f"Old under-voltage warning voltage: {controller.get_under_voltage_warning_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            under_voltage_warning_voltage=args.set_under_voltage_warning_voltage
-        )
-        print(f"New under-voltage warning voltage: {controller.get_under_voltage_warning_voltage()}V")
+    controller = EpeverChargeController(
+        args.portname, args.slaveaddress, args.baudrate, builtin_rtu=args.builtin_rtu
+    )
+    if args.capabilities:
+        from epevermodbus.capabilities import apply_capabilities
 
-    if args.set_under_voltage_recover_voltage:
-        print(f"Old under-voltage recover voltage: {controller.get_under_voltage_recover_voltage()}V")
-        controller.set_battery_voltage_control_registers(
-            under_voltage_recover_voltage=args.set_under_voltage_recover_voltage
-        )
-        print(f"New under-voltage recover voltage: {controller.get_under_voltage_recover_voltage()}V")
-
-    if any([
-        args.set_time,
-        args.set_battery_capacity,
-        args.set_battery_temp_comp_coeff,
-        args.set_over_voltage_disconnect_voltage,
-        args.set_over_voltage_reconnect_voltage,
-        args.set_charging_limit_voltage,
-        args.set_discharging_limit_voltage,
-        args.set_boost_charging_voltage,
-        args.set_boost_reconnect_charging_voltage,
-        args.set_equalize_charging_voltage,
-        args.set_float_charging_voltage,
-        args.set_low_voltage_disconnect_voltage,
-        args.set_low_voltage_reconnect_voltage,
-        args.set_under_voltage_warning_voltage,
-        args.set_under_voltage_recover_voltage,
-    ]):
-        exit(0)
+        apply_capabilities(controller, args.capabilities)
+    return controller
+
+
+def select_fields(names):
+    if not names:
+        return FIELDS
+    return tuple(field for field in FIELDS if field[0] in names)
+
+
+def read_fields(controller, fields):
+    """Values of the fields that could be read (None otherwise) and errors by field"""
+    snapshot = controller.get_snapshot([name for name, _, _, _ in fields])
+    values = {name: reading["value"] for name, reading in snapshot.items()}
+    errors = {
+        name: reading["error"]
+        for name, reading in snapshot.items()
+        if reading["status"] != "ok"
+    }
+    return values, errors
+
+
+def to_json(values):
+    import datetime
+    import json
+
+    return json.dumps(
+        {
+            name: value.isoformat() if isinstance(value, datetime.datetime) else value
+            for name, value in values.items()
+        }
+    )
+
+
+def print_values(values, errors, fields):
+    for name, label, unit, _ in fields:
+        if name in errors:
+            print(f"{label}: unavailable ({errors[name]})")
+        else:
+            print(f"{label}: {values[name]}{unit}")
+
+
+def print_all_values(values, errors):
+    print("Real Time Data")
+    print_values(values, errors, REAL_TIME_FIELDS)
+    print("\n")
+    print("Battery Parameters:")
+    print_values(values, errors, BATTERY_PARAMETER_FIELDS)
+
+
+def with_errors(values, errors):
+    return dict(values, errors=errors) if errors else values
+
+
+def read(args):
+    controller = create_controller(args)
+    fields = select_fields(args.fields)
+    values, errors = read_fields(controller, fields)
 
     if args.json:
-        output = {}
-        output["solar_voltage"] = controller.get_solar_voltage()
-        output["solar_current"] = controller.get_solar_current()
-        output["solar_power"] = controller.get_solar_power()
-        output["load_voltage"] = controller.get_load_voltage()
-        output["load_current"] = controller.get_load_current()
-        output["load_power"] = controller.get_load_power()
-        output["battery_voltage"] = controller.get_battery_voltage()
-        output["battery_current"] = controller.get_battery_current()
-        output["battery_power"] = controller.get_battery_power()
-        output["battery_state_of_charge"] = controller.get_battery_state_of_charge()
-        output["battery_temperature"] = controller.get_battery_temperature()
-        output["remote_battery_temperature"] = controller.get_remote_battery_temperature()
-        output["controller_temperature"] = controller.get_controller_temperature()
-        output["battery_status"] = controller.get_battery_status()
-        output["charging_equipment_status"] = controller.get_charging_equipment_status()
-        output["discharging_equipment_status"] = controller.get_discharging_equipment_status()
-        output["day_time"] = controller.is_day()
-        output["night_time"] = controller.is_night()
-        output["maximum_battery_voltage_today"] = controller.get_maximum_battery_voltage_today()
-        output["minimum_battery_voltage_today"] = controller.get_minimum_battery_voltage_today()
-        output["maximum_pv_voltage_today"] = controller.get_maximum_pv_voltage_today()
-        output["minimum_pv_voltage_today"] = controller.get_minimum_pv_voltage_today()
-        output["device_over_temperature"] = controller.is_device_over_temperature()
-        output["consumed_energy_today"] = controller.get_consumed_energy_today()
-        output["consumed_energy_this_month"] = controller.get_consumed_energy_this_month()
-        output["consumed_energy_this_year"] = controller.get_consumed_energy_this_year()
-        output["total_consumed_energy"] = controller.get_total_consumed_energy()
-        output["generated_energy_today"] = controller.get_generated_energy_today()
-        output["generated_energy_this_month"] = controller.get_generated_energy_this_month()
-        output["generated_energy_this_year"] = controller.get_generated_energy_this_year()
-        output["total_generated_energy"] = controller.get_total_generated_energy()
-        output["current_device_time"] = controller.get_rtc().isoformat()
-        output["rated_charging_current"] = controller.get_rated_charging_current()
-        output["rated_load_current"] = controller.get_rated_load_current()
-        output["battery_real_rated_voltage"] = controller.get_battery_real_rated_voltage()
-        output["battery_type"] = controller.get_battery_type()
-        output["battery_capacity"] = controller.get_battery_capacity()
-        output["temperature_compensation_coefficient"] = controller.get_temperature_compensation_coefficient()
-        output["over_voltage_disconnect_voltage"] = controller.get_over_voltage_disconnect_voltage()
-        output["charging_limit_voltage"] = controller.get_charging_limit_voltage()
-        output["over_voltage_reconnect_voltage"] = controller.get_over_voltage_reconnect_voltage()
-        output["equalize_charging_voltage"] = controller.get_equalize_charging_voltage()
-        output["boost_charging_voltage"] = controller.get_boost_charging_voltage()
-        output["float_charging_voltage"] = controller.get_float_charging_voltage()
-        output["boost_reconnect_charging_voltage"] = controller.get_boost_reconnect_charging_voltage()
-        output["low_voltage_reconnect_voltage"] = controller.get_low_voltage_reconnect_voltage()
-        output["under_voltage_recover_voltage"] = controller.get_under_voltage_recover_voltage()
-        output["under_voltage_warning_voltage"] = controller.get_under_voltage_warning_voltage()
-        output["low_voltage_disconnect_voltage"] = controller.get_low_voltage_disconnect_voltage()
-        output["discharging_limit_voltage"] = controller.get_discharging_limit_voltage()
-        output["battery_rated_voltage"] = controller.get_battery_rated_voltage()
-        output["default_load_on_off_in_manual_mode"] = controller.get_default_load_on_off_in_manual_mode()
-        output["equalize_duration"] = controller.get_equalize_duration()
-        output["boost_duration"] = controller.get_boost_duration()
-        output["battery_discharge"] = controller.get_battery_discharge()
-        output["battery_charge"] = controller.get_battery_charge()
-        output["charging_mode"] = controller.get_charging_mode()
-        print(json.dumps(output))
+        print(to_json(with_errors(values, errors)))
+    elif args.fields:
+        print_values(values, errors, fields)
     else:
-        print("Real Time Data")
-        print(f"Solar voltage: {controller.get_solar_voltage()}V")
-        print(f"Solar current: {controller.get_solar_current()}A")
-        print(f"Solar power: {controller.get_solar_power()}W")
-        print(f"Load voltage: {controller.get_load_voltage()}V")
-        print(f"Load current: {controller.get_load_current()}A")
-        print(f"Load power: {controller.get_load_power()}W")
-        print(f"Battery voltage: {controller.get_battery_voltage()}V")
-        print(f"Battery current: {controller.get_battery_current()}A")
-        print(f"Battery power: {controller.get_battery_power()}W")
-        print(
-            f"Battery state of charge: {controller.get_battery_state_of_charge()}%")
-        print(f"Battery temperature: {controller.get_battery_temperature()}°C")
-        print(
-            f"Remote battery temperature: {controller.get_remote_battery_temperature()}°C"
-        )
-        print(
-            f"Controller temperature: {controller.get_controller_temperature()}°C")
-        print(f"Battery status: {controller.get_battery_status()}")
-        print(
-            f"Charging equipment status: {controller.get_charging_equipment_status()}")
-        print(
-            f"Discharging equipment status: {controller.get_discharging_equipment_status()}"
-        )
-        print(f"Day time: {controller.is_day()}")
-        print(f"Night time: {controller.is_night()}")
-        print(
-            f"Maximum battery voltage today: {controller.get_maximum_battery_voltage_today()}V"
-        )
-        print(
-            f"Minimum battery voltage today: {controller.get_minimum_battery_voltage_today()}V"
-        )
-        print(f"Maximum PV voltage today: {controller.get_maximum_pv_voltage_today()}V")
-        print(f"Minimum PV voltage today: {controller.get_minimum_pv_voltage_today()}V")
-        print(
-            f"Device over temperature: {controller.is_device_over_temperature()}")
-        print(f"Consumed energy today: {controller.get_consumed_energy_today()}kWh")
-        print(f"Consumed energy this month: {controller.get_consumed_energy_this_month()}kWh")
-        print(f"Consumed energy this year: {controller.get_consumed_energy_this_year()}kWh")
-        print(f"Total consumed energy: {controller.get_total_consumed_energy()}kWh")
-        print(f"Generated energy today: {controller.get_generated_energy_today()}kWh")
-        print(f"Generated energy this month: {controller.get_generated_energy_this_month()}kWh")
-        print(f"Generated energy this year: {controller.get_generated_energy_this_year()}kWh")
-        print(f"Total generated energy: {controller.get_total_generated_energy()}kWh")
-        print(f"Current device time: {controller.get_rtc()}")
-        print("\n")
-    
-        print("Battery Parameters:")
-        print(
-            f"Rated charging current: {controller.get_rated_charging_current()}A")
-        print(f"Rated load current: {controller.get_rated_load_current()}A")
-        print(
-            f"Battery real rated voltage: {controller.get_battery_real_rated_voltage()}V")
-        print(f"Battery type: {controller.get_battery_type()}")
-        print(f"Battery capacity: {controller.get_battery_capacity()}AH")
-        print(
-            "Temperature compensation coefficient: "
-            f"{controller.get_temperature_compensation_coefficient()}mV/°C/Cell"
-        )
-        print(
-            f"Over voltage disconnect voltage: {controller.get_over_voltage_disconnect_voltage()}V"
-        )
-        print(
-            f"Charging limit voltage: {controller.get_charging_limit_voltage()}V")
-        print(
-            f"Over voltage reconnect voltage: {controller.get_over_voltage_reconnect_voltage()}V"
-        )
-        print(
-            f"Equalize charging voltage: {controller.get_equalize_charging_voltage()}V")
-        print(
-            f"Boost charging voltage: {controller.get_boost_charging_voltage()}V")
-        print(
-            f"Float charging voltage: {controller.get_float_charging_voltage()}V")
-        print(
-            f"Boost reconnect charging voltage: {controller.get_boost_reconnect_charging_voltage()}V"
-        ),
-        print(
-            f"Low voltage reconnect voltage: {controller.get_low_voltage_reconnect_voltage()}V"
-        )
-        print(
-            f"Under voltage recover voltage: {controller.get_under_voltage_recover_voltage()}V"
-        )
-        print(
-            f"Under voltage warning voltage: {controller.get_under_voltage_warning_voltage()}V"
+        print_all_values(values, errors)
+
+    if len(errors) == len(fields):
+        sys.exit(1)
+
+
+def watch(args):
+    import time
+
+    controller = create_controller(args)
+    fields = select_fields(args.fields)
+    readings = 0
+
+    while args.count is None or readings < args.count:
+        started = time.monotonic()
+        try:
+            values, errors = read_fields(controller, fields)
+        except EOFError:
+            break
+        readings += 1
+
+        if args.json:
+            print(
+                to_json(dict(with_errors(values, errors), timestamp=time.time())),
+                flush=True,
+            )
+        else:
+            print_values(values, errors, fields)
+            print(flush=True)
+
+        if args.count is None or readings < args.count:
+            time.sleep(max(0, args.interval - (time.monotonic() - started)))
+
+
+def parse_settings(parser, settings):
+    import datetime
+
+    labels = {name: (label, unit, getter) for name, label, unit, getter in SETTINGS}
+    parsed = {}
+    for setting in settings:
+        name, _, value = setting.partition("=")
+        if name not in labels:
+            parser.error(
+                f"unknown setting {name!r}, choose from {', '.join(SETTING_NAMES)}"
+            )
+        if name != "time" and not value:
+            parser.error(f"setting {name!r} needs a value")
+        try:
+            if name == "time":
+                parsed[name] = datetime.datetime.fromisoformat(value) if value else None
+            elif name == "battery_capacity":
+                parsed[name] = int(value)
+            else:
+                parsed[name] = float(value)
+        except ValueError:
+            parser.error(f"invalid value for {name}: {value}")
+    return parsed, labels
+
+
+def set_settings(args, parser):
+    settings, labels = parse_settings(parser, args.settings)
+    controller = create_controller(args)
+
+    old_values = {name: getattr(controller, labels[name][2])() for name in settings}
+
+    voltage_settings = {
+        name: value
+        for name, value in settings.items()
+        if name in controller.battery_voltage_control_register_names
+    }
+    if voltage_settings:
+        controller.set_battery_voltage_control_registers_dict(voltage_settings)
+
+    if "time" in settings:
+        value = settings["time"]
+        if value:
+            controller.set_rtc(value)
+        else:
+            controller.sync_rtc()
+    if "battery_capacity" in settings:
+        controller.set_battery_capacity(settings["battery_capacity"])
+    if "temperature_compensation_coefficient" in settings:
+        controller.set_temperature_compensation_coefficient(
+            settings["temperature_compensation_coefficient"]
         )
+
+    for name in settings:
+        label, unit, getter = labels[name]
+        print(f"Old {label}: {old_values[name]}{unit}")
+        print(f"New {label}: {getattr(controller, getter)()}{unit}")
+
+
+def scan(args):
+    from epevermodbus.scan import COMMON_BAUDRATES, scan as scan_ports
+
+    found = scan_ports(
+        args.portname,
+        baudrates=args.baudrate or COMMON_BAUDRATES,
+        addresses=range(args.first, args.last + 1),
+        timeout=args.timeout,
+        max_misses=None if args.full_sweep else args.max_misses,
+    )
+
+    if args.json:
+        print(to_json({"controllers": found}))
+        return
+    for controller in found:
         print(
-            f"Low voltage disconnect voltage: {controller.get_low_voltage_disconnect_voltage()}V"
+            f"Found controller at {controller['port']} "
+            f"slave address {controller['slaveaddress']} "
+            f"baudrate {controller['baudrate']}: "
+            f"rated {controller['battery_rated_voltage']}V "
+            f"{controller['rated_charging_current']}A "
+            f"{controller['rated_charging_mode']}"
         )
-        print(
-            f"Discharging limit voltage: {controller.get_discharging_limit_voltage()}V")
-        print(f"Battery rated voltage: {controller.get_battery_rated_voltage()}")
-        print(
-            "Default load on/off in manual mode:",
-            controller.get_default_load_on_off_in_manual_mode(),
+    if not found:
+        print("No controllers found")
+
+
+def serve(args):
+    from epevermodbus.server import SnapshotServer
+
+    server = SnapshotServer(
+        (args.host, args.port), create_controller(args), args.max_age
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def publish(args):
+    from epevermodbus.shm import SnapshotPublisher, publish_forever
+
+    publisher = SnapshotPublisher(args.path)
+    try:
+        publish_forever(create_controller(args), publisher, args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        publisher.close()
+
+
+def gateway(args):
+    from epevermodbus.gateway import ModbusTcpGateway
+
+    server = ModbusTcpGateway(
+        (args.host, args.port),
+        [create_controller(args)],
+        args.interval,
+        max_age=args.max_age,
+    )
+    try:
+        server.start_polling()
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def record(args):
+    from epevermodbus.recording import record_forever
+
+    controller = create_controller(args)
+    with open(args.output, "a") as file:
+        try:
+            record_forever(controller, file, args.interval, args.count)
+        except KeyboardInterrupt:
+            pass
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(
+        translate_legacy_arguments(sys.argv[1:] if argv is None else argv)
+    )
+
+    unknown_fields = [
+        name for name in getattr(args, "fields", ()) if name not in FIELD_NAMES
+    ]
+    if unknown_fields:
+        parser.error(
+            f"unknown field {unknown_fields[0]!r}, choose from {', '.join(FIELD_NAMES)}"
         )
-        print(f"Equalize duration: {controller.get_equalize_duration()} min")
-        print(f"Boost duration: {controller.get_boost_duration()} min")
-        print(f"Battery discharge: {controller.get_battery_discharge()}%")
-        print(f"Battery charge: {controller.get_battery_charge()}%")
-        print(f"Charging mode: {controller.get_charging_mode()}")
+
+    if args.command == "set":
+        set_settings(args, parser)
+    elif args.command == "watch":
+        watch(args)
+    elif args.command == "scan":
+        scan(args)
+    elif args.command == "serve":
+        serve(args)
+    elif args.command == "publish":
+        publish(args)
+    elif args.command == "gateway":
+        gateway(args)
+    elif args.command == "record":
+        record(args)
+    else:
+        read(args)
 
 
 if __name__ == "__main__":
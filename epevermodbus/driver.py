@@ -1,10 +1,132 @@
+import contextlib
 import datetime
+import math
+import time
 
 import minimalmodbus
 import serial
 from retrying import retry
 
 from epevermodbus.extract_bits import extract_bits
+from epevermodbus.fields import FIELD_GETTERS, FIELD_NAMES, FIELD_REGISTERS
+from epevermodbus.rtu import RtuTransport
+from epevermodbus.scheduler import CONTROL
+
+# (functioncode, start address, number of registers) of the blocks that
+# together cover every register read by the getters below
+REGISTER_BLOCKS = (
+    (1, 0x0000, 4),  # load control coils
+    (1, 0x0005, 2),
+    (2, 0x2000, 1),  # discrete inputs
+    (2, 0x200C, 1),
+    (4, 0x3000, 9),  # rated data
+    (4, 0x300E, 1),
+    (4, 0x3100, 8),  # real time data
+    (4, 0x310C, 6),
+    (4, 0x311A, 2),
+    (4, 0x311D, 1),
+    (4, 0x3200, 3),  # status
+    (4, 0x3300, 20),  # statistics
+    (4, 0x331A, 3),
+    (3, 0x9000, 15),  # battery settings
+    (3, 0x9013, 3),  # real time clock
+    (3, 0x9067, 1),
+    (3, 0x906A, 5),
+    (3, 0x9070, 1),
+)
+
+
+# Discrete inputs (function code 2) by name
+DISCRETE_INPUTS = {
+    "device_over_temperature": 0x2000,
+    "night": 0x200C,
+}
+
+# Coils (function code 1) by name
+COILS = {
+    "charging_device_on": 0x0000,
+    "output_control_mode_manual": 0x0001,
+    "manual_load_on": 0x0002,
+    "default_load_on": 0x0003,
+    "load_test_mode": 0x0005,
+    "force_load_on": 0x0006,
+}
+
+
+def _contiguous_runs(addresses):
+    """(start, count) of each run of consecutive addresses"""
+    runs = []
+    for address in sorted(set(addresses)):
+        if runs and runs[-1][0] + runs[-1][1] == address:
+            runs[-1][1] += 1
+        else:
+            runs.append([address, 1])
+    return [tuple(run) for run in runs]
+
+
+def blocks_for_fields(names):
+    """The register blocks needed to read the named fields"""
+    blocks = []
+    for name in names:
+        for functioncode, address, count in FIELD_REGISTERS[name]:
+            for block in REGISTER_BLOCKS:
+                block_functioncode, start, block_count = block
+                if (
+                    block_functioncode == functioncode
+                    and start <= address
+                    and address + count <= start + block_count
+                    and block not in blocks
+                ):
+                    blocks.append(block)
+    return sorted(blocks)
+
+
+def _is_retriable(exception):
+    """Only retry failed bus transactions
+
+    Registers missing from a snapshot, and registers the device reported as
+    illegal addresses, fail the same way however often they are read.
+    """
+    return not isinstance(exception, (LookupError, minimalmodbus.IllegalRequestError))
+
+
+def _decode_register(value, number_of_decimals, signed):
+    if signed and value >= 0x8000:
+        value -= 0x10000
+    if number_of_decimals:
+        return value / 10 ** number_of_decimals
+    return value
+
+
+def _decode_long(first, second, signed, byteorder):
+    if byteorder == minimalmodbus.BYTEORDER_LITTLE_SWAP:
+        value = first | second << 16
+    elif byteorder == minimalmodbus.BYTEORDER_BIG:
+        value = first << 16 | second
+    else:
+        raise ValueError(f"Unsupported byteorder: {byteorder}")
+    if signed and value >= 0x80000000:
+        value -= 0x100000000
+    return value
+
+
+def _supported_ranges(functioncode, address, count, unsupported_registers):
+    """Splits a block into (start, count) ranges around unsupported registers"""
+    if not unsupported_registers:
+        return [(address, count)]
+    ranges = []
+    start = None
+    for register in range(address, address + count + 1):
+        supported = (
+            register < address + count
+            and (functioncode, register) not in unsupported_registers
+        )
+        if supported and start is None:
+            start = register
+        elif not supported and start is not None:
+            ranges.append((start, register - start))
+            start = None
+    return ranges
 
 
 class EpeverChargeController(minimalmodbus.Instrument):
@@ -14,9 +136,26 @@ class EpeverChargeController(minimalmodbus.Instrument):
         * portname (str): port name
         * slaveaddress (int): slave address in the range 1 to 247
         * baudrate (int): baudrate to communicate with controller (default is 115200)
+        * builtin_rtu (bool): read through epevermodbus.rtu instead of
+          minimalmodbus, which costs less CPU per transaction. Writes always
+          go through minimalmodbus. (default is False)
+        * scheduler (BusScheduler): shared by the controllers on this bus to
+          send urgent transactions first, see epevermodbus.scheduler
+          (default is None, transactions are sent in call order)
 
     """
 
+    # RtuTransport used for reads, None to read through minimalmodbus
+    rtu = None
+    _rtu_roundtrip_time = None
+
+    # BusScheduler granting the bus to one transaction at a time, or None
+    scheduler = None
+
+    # (functioncode, address) of registers this device does not have, skipped
+    # by read_register_blocks. See epevermodbus.capabilities.
+    unsupported_registers = frozenset()
+
     battery_voltage_control_register_names = [
         "over_voltage_disconnect_voltage",
         "charging_limit_voltage",
@@ -32,7 +171,9 @@ class EpeverChargeController(minimalmodbus.Instrument):
         "discharging_limit_voltage"
     ]
 
-    def __init__(self, portname, slaveaddress, baudrate=115200):
+    def __init__(
+        self, portname, slaveaddress, baudrate=115200, builtin_rtu=False, scheduler=None
+    ):
         minimalmodbus.Instrument.__init__(self, portname, slaveaddress)
         self.serial.baudrate = baudrate
         self.serial.bytesize = 8
@@ -41,8 +182,101 @@ class EpeverChargeController(minimalmodbus.Instrument):
         self.serial.timeout = 1
         self.mode = minimalmodbus.MODE_RTU
         self.clear_buffers_before_each_transaction = True
+        if builtin_rtu:
+            self.rtu = RtuTransport(self.serial, (slaveaddress,), REGISTER_BLOCKS)
+        self.scheduler = scheduler
+
+    def _bus(self, functioncode, registeraddress=None):
+        """Holds the bus for one transaction when a scheduler is shared"""
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.transaction(
+            self.scheduler.priority_for(functioncode, registeraddress)
+        )
 
-    @retry(wait_fixed=200, stop_max_attempt_number=5)
+    @property
+    def roundtrip_time(self):
+        """Latest measured round trip time in seconds, None if there is none yet"""
+        if self.rtu is None:
+            return super().roundtrip_time
+        return self._rtu_roundtrip_time
+
+    def _hold_bus(self):
+        """Holds a shared bus as CONTROL for several transactions in a row"""
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.transaction(CONTROL)
+
+    def _control(self):
+        """Sends a read-modify-write as CONTROL when a scheduler is shared"""
+        if self.scheduler is None:
+            return contextlib.nullcontext()
+        return self.scheduler.priority(CONTROL)
+
+    def _perform_command(self, functioncode, payload_to_slave):
+        registeraddress = (
+            int.from_bytes(payload_to_slave[:2], "big") if functioncode != 43 else None
+        )
+        with self._bus(functioncode, registeraddress):
+            if self.rtu is None:
+                return super()._perform_command(functioncode, payload_to_slave)
+
+            # minimalmodbus keeps its own silent period bookkeeping, so its
+            # frames are spaced from the transport's here
+            self.rtu.wait_silent_period()
+            try:
+                return super()._perform_command(functioncode, payload_to_slave)
+            finally:
+                self.rtu.mark_read()
+                self._rtu_roundtrip_time = super().roundtrip_time
+
+    def _rtu_read(self, registeraddress, count, functioncode):
+        try:
+            with self._bus(functioncode, registeraddress):
+                return self.rtu.read(self.address, functioncode, registeraddress, count)
+        finally:
+            self._rtu_roundtrip_time = self.rtu.roundtrip_time
+
+    def read_bit(self, registeraddress, functioncode=2):
+        if self.rtu is None:
+            return super().read_bit(registeraddress, functioncode)
+        return self._rtu_read(registeraddress, 1, functioncode)[0]
+
+    def read_bits(self, registeraddress, number_of_bits, functioncode=2):
+        if self.rtu is None:
+            return super().read_bits(registeraddress, number_of_bits, functioncode)
+        return self._rtu_read(registeraddress, number_of_bits, functioncode)
+
+    def read_register(
+        self, registeraddress, number_of_decimals=0, functioncode=3, signed=False
+    ):
+        if self.rtu is None:
+            return super().read_register(
+                registeraddress, number_of_decimals, functioncode, signed
+            )
+        (value,) = self._rtu_read(registeraddress, 1, functioncode)
+        return _decode_register(value, number_of_decimals, signed)
+
+    def read_registers(self, registeraddress, number_of_registers, functioncode=3):
+        if self.rtu is None:
+            return super().read_registers(
+                registeraddress, number_of_registers, functioncode
+            )
+        return self._rtu_read(registeraddress, number_of_registers, functioncode)
+
+    def read_long(
+        self,
+        registeraddress,
+        functioncode=3,
+        signed=False,
+        byteorder=minimalmodbus.BYTEORDER_BIG,
+    ):
+        if self.rtu is None:
+            return super().read_long(registeraddress, functioncode, signed, byteorder)
+        first, second = self._rtu_read(registeraddress, 2, functioncode)
+        return _decode_long(first, second, signed, byteorder)
+
+    @retry(wait_fixed=200, stop_max_attempt_number=5, retry_on_exception=_is_retriable)
     def retriable_read_register(
         self, registeraddress, number_of_decimals, functioncode, signed=False
     ):
@@ -50,7 +284,7 @@ class EpeverChargeController(minimalmodbus.Instrument):
             registeraddress, number_of_decimals, functioncode, signed
         )
 
-    @retry(wait_fixed=200, stop_max_attempt_number=5)
+    @retry(wait_fixed=200, stop_max_attempt_number=5, retry_on_exception=_is_retriable)
     def retriable_read_registers(
         self, registeraddress, number_of_registers, functioncode
     ):
@@ -58,7 +292,7 @@ class EpeverChargeController(minimalmodbus.Instrument):
             registeraddress, number_of_registers, functioncode
         )
 
-    @retry(wait_fixed=200, stop_max_attempt_number=5)
+    @retry(wait_fixed=200, stop_max_attempt_number=5, retry_on_exception=_is_retriable)
     def retriable_read_long(
         self, registeraddress, functioncode, signed=False, byteorder=minimalmodbus.BYTEORDER_LITTLE_SWAP
     ):
@@ -66,10 +300,139 @@ class EpeverChargeController(minimalmodbus.Instrument):
             registeraddress, functioncode, signed, byteorder
         )
 
-    @retry(wait_fixed=200, stop_max_attempt_number=5)
+    @retry(wait_fixed=200, stop_max_attempt_number=5, retry_on_exception=_is_retriable)
     def retriable_read_bit(self, registeraddress, functioncode):
         return self.read_bit(registeraddress, functioncode)
 
+    @retry(wait_fixed=200, stop_max_attempt_number=5, retry_on_exception=_is_retriable)
+    def retriable_read_bits(self, registeraddress, number_of_bits, functioncode):
+        return self.read_bits(registeraddress, number_of_bits, functioncode)
+
+    def read_register_blocks(self, blocks=REGISTER_BLOCKS, retriable=True):
+        """Reads whole blocks of registers, one transaction per block
+
+        Args:
+            * blocks: (functioncode, start address, number of registers) tuples
+            * retriable (bool): retry failed transactions (default True)
+
+        Returns a dict of register values keyed by (functioncode, address),
+        which RegisterSnapshot decodes with the same getters. Registers in
+        unsupported_registers are left out and the block is read around them.
+        """
+        read_bits = self.retriable_read_bits if retriable else self.read_bits
+        read_registers = (
+            self.retriable_read_registers if retriable else self.read_registers
+        )
+        registers = {}
+        for functioncode, address, count in blocks:
+            for start, length in _supported_ranges(
+                functioncode, address, count, self.unsupported_registers
+            ):
+                if functioncode in (1, 2):
+                    values = read_bits(start, length, functioncode)
+                else:
+                    values = read_registers(start, length, functioncode)
+                for offset, value in enumerate(values):
+                    registers[(functioncode, start + offset)] = value
+        return registers
+
+    def get_fields(self, names=FIELD_NAMES):
+        """Reads the named fields with one transaction per register block
+
+        Returns a dict of the values keyed by field name
+        """
+        registers = self.read_register_blocks(blocks_for_fields(names))
+        return RegisterSnapshot(registers).get_fields(names)
+
+    def get_device_identification(self):
+        """Vendor name, product code and firmware revision
+
+        Uses Modbus function code 43 (read device identification).
+        """
+        payload = self._perform_command(43, bytes([0x0E, 0x01, 0x00]))
+        number_of_objects = payload[5]
+        names = {0: "vendor_name", 1: "product_code", 2: "revision"}
+        identification = {}
+        position = 6
+        for _ in range(number_of_objects):
+            object_id, length = payload[position], payload[position + 1]
+            value = payload[position + 2 : position + 2 + length]
+            identification[names.get(object_id, object_id)] = value.decode(
+                "ascii", "replace"
+            )
+            position += 2 + length
+        return identification
+
+    def get_snapshot(self, names=FIELD_NAMES, deadline=5.0):
+        """Reads the named fields, returning whatever could be read
+
+        Each register block is read on its own. Blocks that fail are retried
+        every 200 ms until they succeed or *deadline* seconds have passed,
+        without reading the blocks that succeeded again. Illegal address
+        errors are not retried. The deadline is checked before every
+        request, and blocks not requested by then are not read at all.
+
+        Returns a dict keyed by field name of dicts with:
+            * value: the decoded value, None if the field failed
+            * status: "ok", "error", "timeout" (the deadline passed before
+              the field's registers were read) or "unsupported" (see
+              unsupported_registers)
+            * timestamp: time.time() the field's registers were read
+            * error: description of the failure, None if the field is ok
+        """
+        give_up = time.monotonic() + deadline
+        pending = blocks_for_fields(names)
+        registers = {}
+        read_times = {}
+        errors = {}
+
+        while True:
+            failed = []
+            for position, block in enumerate(pending):
+                if time.monotonic() >= give_up:
+                    for late in pending[position:]:
+                        errors.setdefault(
+                            late,
+                            TimeoutError("Deadline passed before the block was read"),
+                        )
+                    pending = []
+                    break
+                try:
+                    registers.update(
+                        self.read_register_blocks([block], retriable=False)
+                    )
+                except (IOError, ValueError) as error:
+                    errors[block] = error
+                    if not isinstance(error, minimalmodbus.IllegalRequestError):
+                        failed.append(block)
+                    continue
+                read_times[block] = time.time()
+                errors.pop(block, None)
+            else:
+                pending = failed
+            if not pending or time.monotonic() + 0.2 > give_up:
+                break
+            time.sleep(0.2)
+
+        return RegisterSnapshot(registers, self.address).get_readings(
+            names, read_times, errors
+        )
+
+    def get_rated_data(self):
+        """Rated values of the controller, read in one transaction"""
+        registers = self.retriable_read_registers(0x3000, 9, 4)
+        return {
+            "pv_rated_voltage": registers[0] / 100,
+            "pv_rated_current": registers[1] / 100,
+            "pv_rated_power": (registers[2] | registers[3] << 16) / 100,
+            "battery_rated_voltage": registers[4] / 100,
+            "rated_charging_current": registers[5] / 100,
+            "rated_charging_power": (registers[6] | registers[7] << 16) / 100,
+            "rated_charging_mode": {0: "CONNECT_DISCONNECT", 1: "PWM", 2: "MPPT"}.get(
+                registers[8]
+            ),
+        }
+
     def get_solar_voltage(self):
         """PV array input in volts"""
         return self.retriable_read_register(0x3100, 2, 4)
@@ -249,6 +612,41 @@ class EpeverChargeController(minimalmodbus.Instrument):
         """Over temperature inside the device"""
         return True if self.retriable_read_bit(0x2000, 2) == 1 else False
 
+    def _read_named_bits(self, addresses, functioncode):
+        # Unmapped addresses between the named ones are not read, since
+        # devices may answer them with an illegal address exception
+        bits = {}
+        for start, count in _contiguous_runs(addresses.values()):
+            values = self.retriable_read_bits(start, count, functioncode)
+            bits.update({start + offset: value for offset, value in enumerate(values)})
+        return {name: bits[address] == 1 for name, address in addresses.items()}
+
+    def get_discrete_inputs(self):
+        """All discrete inputs by name, one transaction per run of addresses"""
+        return self._read_named_bits(DISCRETE_INPUTS, 2)
+
+    def get_coils(self):
+        """All load control coils by name, one transaction per run of addresses"""
+        return self._read_named_bits(COILS, 1)
+
+    def set_coil(self, name: str, value: bool):
+        """Set one of the coils named in COILS"""
+        if name not in COILS:
+            raise TypeError(f"set_coil() got an unknown coil name {name!r}")
+        self.write_bit(COILS[name], int(value), 5)
+
+    def set_manual_load_on(self, on: bool):
+        """Switch the load on or off while the load is in manual mode"""
+        self.set_coil("manual_load_on", on)
+
+    def set_load_test_mode(self, enabled: bool):
+        """Enable or disable load test mode"""
+        self.set_coil("load_test_mode", enabled)
+
+    def set_force_load_on(self, on: bool):
+        """Force the load on or off, used for temporary tests of the load"""
+        self.set_coil("force_load_on", on)
+
     def get_maximum_battery_voltage_today(self):
         """Maximum battery voltage today"""
         return self.retriable_read_register(0x3302, 2, 4)
@@ -333,6 +731,19 @@ class EpeverChargeController(minimalmodbus.Instrument):
         * have key names in battery_voltage_control_register_names
         * have one or more key names.
         """
+        self.check_battery_voltage_control_registers(control_registers)
+
+        with self._control():
+            values_dict = self.get_battery_voltage_control_registers()
+            values_dict.update(control_registers)
+
+            self.write_registers(
+                0x9003, self.battery_voltage_control_register_values(values_dict)
+            )
+        return
+
+    def check_battery_voltage_control_registers(self, control_registers: dict):
+        """Raises TypeError unless the dict has one or more valid key names"""
         if not len(control_registers):
             raise TypeError(
                 "set_battery_voltage_control_registers() missing keyword arguments"
@@ -346,17 +757,13 @@ class EpeverChargeController(minimalmodbus.Instrument):
                 "set_battery_voltage_control_registers() got an unexpected keyword argument"
             )
 
-        values_dict = self.get_battery_voltage_control_registers()
-        values_dict.update(control_registers)
-
-        values = [
-            int(values_dict[register_name] * 100)
+    def battery_voltage_control_register_values(self, control_registers: dict):
+        """Raw values of all 12 battery voltage control registers, in register order"""
+        return [
+            int(control_registers[register_name] * 100)
             for register_name in self.battery_voltage_control_register_names
         ]
 
-        self.write_registers(0x9003, values)
-        return
-
     def get_over_voltage_disconnect_voltage(self):
         """Over voltage disconnect voltage"""
         return self.retriable_read_register(0x9003, 2, 3)
@@ -493,15 +900,12 @@ class EpeverChargeController(minimalmodbus.Instrument):
                  None otherwise
         """
 
-        reg_ms = self.retriable_read_register(0x9013, 0, 3)
+        # One transaction, so the seconds cannot roll over between registers
+        reg_ms, reg_hd, reg_my = self.retriable_read_registers(0x9013, 3, 3)
         second = extract_bits(reg_ms, 0, 0b1111_1111)
         minute = extract_bits(reg_ms, 8, 0b1111_1111)
-
-        reg_hd = self.retriable_read_register(0x9014, 0, 3)
         hour = extract_bits(reg_hd, 0, 0b1111_1111)
         day = extract_bits(reg_hd, 8, 0b1111_1111)
-
-        reg_my = self.retriable_read_register(0x9015, 0, 3)
         month = extract_bits(reg_my, 0, 0b1111_1111)
         year = extract_bits(reg_my, 8, 0b1111_1111)+2000
 
@@ -523,3 +927,160 @@ class EpeverChargeController(minimalmodbus.Instrument):
         reg_my = new_time.month + ((new_time.year-2000) << 8)
 
         self.write_registers(0x9013, [reg_ms, reg_hd, reg_my])
+
+    def sync_rtc(self, writer=None):
+        """
+        Set the RTC to the local time, compensated for the bus latency.
+
+        The round trip time of an RTC read is measured first and half of it
+        is taken as the one-way latency. The write is then delayed so that
+        the new value reaches the controller on a whole second, which is the
+        resolution of its clock. Finally the RTC is read back. A shared bus
+        is held from the measurement to the read back, so no other frame can
+        delay the write.
+
+        :param writer: controller the timed write is sent through, such as
+                       one at broadcast address 0 on the same port to set
+                       every unit on the bus at once (default self)
+        :return: dict with the round_trip_time in seconds, the written
+                 datetime.datetime and the residual drift in whole seconds
+                 (controller minus local time, None if the read back failed)
+        """
+        writer = self if writer is None else writer
+        with self._hold_bus():
+            self.get_rtc()
+            latency = self.roundtrip_time / 2
+
+            target = math.floor(time.time() + latency) + 1
+            time.sleep(max(0, target - latency - time.time()))
+            written = datetime.datetime.fromtimestamp(target)
+            writer.set_rtc(written)
+
+            drift = self.get_rtc_drift(latency)
+
+        return {
+            "round_trip_time": latency * 2,
+            "written": written,
+            "drift": drift,
+        }
+
+    def get_rtc_drift(self, latency=None):
+        """
+        Reads the RTC and compares it with the local time.
+
+        :param latency: one-way bus latency in seconds (default half the
+                        round trip time of the read)
+        :return: controller minus local time in whole seconds, None if the
+                 RTC is invalid
+        """
+        requested = time.time()
+        device_time = self.get_rtc()
+        if latency is None:
+            latency = self.roundtrip_time / 2
+        # The controller sampled its clock about one latency after the request
+        local_time = datetime.datetime.fromtimestamp(math.floor(requested + latency))
+        if device_time is None:
+            return None
+        return int((device_time - local_time).total_seconds())
+
+
+class RegisterSnapshot(EpeverChargeController):
+    """Getters of EpeverChargeController served from captured register values
+
+    No serial port is opened; every read is answered from *registers*, a dict
+    keyed by (functioncode, address) as returned by read_register_blocks.
+    Reading a register that was not captured raises KeyError.
+
+    Args:
+        * registers (dict): register values keyed by (functioncode, address)
+        * slaveaddress (int): slave address the registers were read from
+    """
+
+    def __init__(self, registers, slaveaddress=1):
+        self.registers = registers
+        self.address = slaveaddress
+
+    def get_fields(self, names=FIELD_NAMES):
+        """Decodes the named fields from the captured registers"""
+        return {name: getattr(self, FIELD_GETTERS[name])() for name in names}
+
+    def get_readings(self, names=FIELD_NAMES, read_times=None, errors=None):
+        """Decodes the named fields with a status each
+
+        See EpeverChargeController.get_snapshot. Fields whose registers were
+        not captured are "unsupported" rather than raising KeyError.
+
+        Args:
+            * read_times (dict): time.time() each block was read, by block
+            * errors (dict): exception each failed block raised, by block
+        """
+        read_times = read_times or {}
+        errors = errors or {}
+        readings = {}
+        for name in names:
+            field_blocks = blocks_for_fields([name])
+            failures = [errors[block] for block in field_blocks if block in errors]
+            reading = {
+                "value": None,
+                "status": "error",
+                "timestamp": None,
+                "error": None,
+            }
+            if failures:
+                if isinstance(failures[0], TimeoutError):
+                    reading["status"] = "timeout"
+                reading["error"] = str(failures[0]) or type(failures[0]).__name__
+            elif not all(
+                (functioncode, address + offset) in self.registers
+                for functioncode, address, count in FIELD_REGISTERS[name]
+                for offset in range(count)
+            ):
+                reading["status"] = "unsupported"
+                reading["error"] = "Register not supported by this device"
+            else:
+                times = [
+                    read_times[block] for block in field_blocks if block in read_times
+                ]
+                reading["timestamp"] = max(times) if times else None
+                try:
+                    value = getattr(self, FIELD_GETTERS[name])()
+                except (LookupError, ValueError) as error:
+                    reading["error"] = f"Could not decode: {error!r}"
+                else:
+                    if value is None:
+                        # get_rtc returns None for an invalid date
+                        reading["error"] = "Device returned an invalid value"
+                    else:
+                        reading["value"] = value
+                        reading["status"] = "ok"
+            readings[name] = reading
+        return readings
+
+    def read_bit(self, registeraddress, functioncode=2):
+        return self.registers[(functioncode, registeraddress)]
+
+    def read_bits(self, registeraddress, number_of_bits, functioncode=2):
+        return self.read_registers(registeraddress, number_of_bits, functioncode)
+
+    def read_register(
+        self, registeraddress, number_of_decimals=0, functioncode=3, signed=False
+    ):
+        return _decode_register(
+            self.registers[(functioncode, registeraddress)], number_of_decimals, signed
+        )
+
+    def read_registers(self, registeraddress, number_of_registers, functioncode=3):
+        return [
+            self.registers[(functioncode, registeraddress + offset)]
+            for offset in range(number_of_registers)
+        ]
+
+    def read_long(
+        self,
+        registeraddress,
+        functioncode=3,
+        signed=False,
+        byteorder=minimalmodbus.BYTEORDER_BIG,
+    ):
+        first, second = self.read_registers(registeraddress, 2, functioncode)
+        return _decode_long(first, second, signed, byteorder)
@@ -0,0 +1,394 @@
+"""Readable and writable fields of the charge controller.
+
+This module is deliberately free of heavy imports so that the command line
+utility can parse its arguments without loading minimalmodbus or pyserial.
+"""
+
+# (name, label, unit, getter)
+REAL_TIME_FIELDS = (
+    ("solar_voltage", "Solar voltage", "V", "get_solar_voltage"),
+    ("solar_current", "Solar current", "A", "get_solar_current"),
+    ("solar_power", "Solar power", "W", "get_solar_power"),
+    ("load_voltage", "Load voltage", "V", "get_load_voltage"),
+    ("load_current", "Load current", "A", "get_load_current"),
+    ("load_power", "Load power", "W", "get_load_power"),
+    ("battery_voltage", "Battery voltage", "V", "get_battery_voltage"),
+    ("battery_current", "Battery current", "A", "get_battery_current"),
+    ("battery_power", "Battery power", "W", "get_battery_power"),
+    (
+        "battery_state_of_charge",
+        "Battery state of charge",
+        "%",
+        "get_battery_state_of_charge",
+    ),
+    ("battery_temperature", "Battery temperature", "°C", "get_battery_temperature"),
+    (
+        "remote_battery_temperature",
+        "Remote battery temperature",
+        "°C",
+        "get_remote_battery_temperature",
+    ),
+    (
+        "controller_temperature",
+        "Controller temperature",
+        "°C",
+        "get_controller_temperature",
+    ),
+    ("battery_status", "Battery status", "", "get_battery_status"),
+    (
+        "charging_equipment_status",
+        "Charging equipment status",
+        "",
+        "get_charging_equipment_status",
+    ),
+    (
+        "discharging_equipment_status",
+        "Discharging equipment status",
+        "",
+        "get_discharging_equipment_status",
+    ),
+    ("day_time", "Day time", "", "is_day"),
+    ("night_time", "Night time", "", "is_night"),
+    (
+        "maximum_battery_voltage_today",
+        "Maximum battery voltage today",
+        "V",
+        "get_maximum_battery_voltage_today",
+    ),
+    (
+        "minimum_battery_voltage_today",
+        "Minimum battery voltage today",
+        "V",
+        "get_minimum_battery_voltage_today",
+    ),
+    (
+        "maximum_pv_voltage_today",
+        "Maximum PV voltage today",
+        "V",
+        "get_maximum_pv_voltage_today",
+    ),
+    (
+        "minimum_pv_voltage_today",
+        "Minimum PV voltage today",
+        "V",
+        "get_minimum_pv_voltage_today",
+    ),
+    (
+        "device_over_temperature",
+        "Device over temperature",
+        "",
+        "is_device_over_temperature",
+    ),
+    (
+        "consumed_energy_today",
+        "Consumed energy today",
+        "kWh",
+        "get_consumed_energy_today",
+    ),
+    (
+        "consumed_energy_this_month",
+        "Consumed energy this month",
+        "kWh",
+        "get_consumed_energy_this_month",
+    ),
+    (
+        "consumed_energy_this_year",
+        "Consumed energy this year",
+        "kWh",
+        "get_consumed_energy_this_year",
+    ),
+    (
+        "total_consumed_energy",
+        "Total consumed energy",
+        "kWh",
+        "get_total_consumed_energy",
+    ),
+    (
+        "generated_energy_today",
+        "Generated energy today",
+        "kWh",
+        "get_generated_energy_today",
+    ),
+    (
+        "generated_energy_this_month",
+        "Generated energy this month",
+        "kWh",
+        "get_generated_energy_this_month",
+    ),
+    (
+        "generated_energy_this_year",
+        "Generated energy this year",
+        "kWh",
+        "get_generated_energy_this_year",
+    ),
+    (
+        "total_generated_energy",
+        "Total generated energy",
+        "kWh",
+        "get_total_generated_energy",
+    ),
+    ("current_device_time", "Current device time", "", "get_rtc"),
+)
+
+BATTERY_PARAMETER_FIELDS = (
+    (
+        "rated_charging_current",
+        "Rated charging current",
+        "A",
+        "get_rated_charging_current",
+    ),
+    ("rated_load_current", "Rated load current", "A", "get_rated_load_current"),
+    (
+        "battery_real_rated_voltage",
+        "Battery real rated voltage",
+        "V",
+        "get_battery_real_rated_voltage",
+    ),
+    ("battery_type", "Battery type", "", "get_battery_type"),
+    ("battery_capacity", "Battery capacity", "AH", "get_battery_capacity"),
+    (
+        "temperature_compensation_coefficient",
+        "Temperature compensation coefficient",
+        "mV/°C/Cell",
+        "get_temperature_compensation_coefficient",
+    ),
+    (
+        "over_voltage_disconnect_voltage",
+        "Over voltage disconnect voltage",
+        "V",
+        "get_over_voltage_disconnect_voltage",
+    ),
+    (
+        "charging_limit_voltage",
+        "Charging limit voltage",
+        "V",
+        "get_charging_limit_voltage",
+    ),
+    (
+        "over_voltage_reconnect_voltage",
+        "Over voltage reconnect voltage",
+        "V",
+        "get_over_voltage_reconnect_voltage",
+    ),
+    (
+        "equalize_charging_voltage",
+        "Equalize charging voltage",
+        "V",
+        "get_equalize_charging_voltage",
+    ),
+    (
+        "boost_charging_voltage",
+        "Boost charging voltage",
+        "V",
+        "get_boost_charging_voltage",
+    ),
+    (
+        "float_charging_voltage",
+        "Float charging voltage",
+        "V",
+        "get_float_charging_voltage",
+    ),
+    (
+        "boost_reconnect_charging_voltage",
+        "Boost reconnect charging voltage",
+        "V",
+        "get_boost_reconnect_charging_voltage",
+    ),
+    (
+        "low_voltage_reconnect_voltage",
+        "Low voltage reconnect voltage",
+        "V",
+        "get_low_voltage_reconnect_voltage",
+    ),
+    (
+        "under_voltage_recover_voltage",
+        "Under voltage recover voltage",
+        "V",
+        "get_under_voltage_recover_voltage",
+    ),
+    (
+        "under_voltage_warning_voltage",
+        "Under voltage warning voltage",
+        "V",
+        "get_under_voltage_warning_voltage",
+    ),
+    (
+        "low_voltage_disconnect_voltage",
+        "Low voltage disconnect voltage",
+        "V",
+        "get_low_voltage_disconnect_voltage",
+    ),
+    (
+        "discharging_limit_voltage",
+        "Discharging limit voltage",
+        "V",
+        "get_discharging_limit_voltage",
+    ),
+    ("battery_rated_voltage", "Battery rated voltage", "", "get_battery_rated_voltage"),
+    (
+        "default_load_on_off_in_manual_mode",
+        "Default load on/off in manual mode",
+        "",
+        "get_default_load_on_off_in_manual_mode",
+    ),
+    ("equalize_duration", "Equalize duration", " min", "get_equalize_duration"),
+    ("boost_duration", "Boost duration", " min", "get_boost_duration"),
+    ("battery_discharge", "Battery discharge", "%", "get_battery_discharge"),
+    ("battery_charge", "Battery charge", "%", "get_battery_charge"),
+    ("charging_mode", "Charging mode", "", "get_charging_mode"),
+)
+
+FIELDS = REAL_TIME_FIELDS + BATTERY_PARAMETER_FIELDS
+
+FIELD_NAMES = tuple(name for name, _, _, _ in FIELDS)
+
+FIELD_GETTERS = {name: getter for name, _, _, getter in FIELDS}
+
+# (functioncode, start address, number of registers) read by each field
+FIELD_REGISTERS = {
+    "solar_voltage": ((4, 0x3100, 1),),
+    "solar_current": ((4, 0x3101, 1),),
+    "solar_power": ((4, 0x3102, 2),),
+    "load_voltage": ((4, 0x310C, 1),),
+    "load_current": ((4, 0x310D, 1),),
+    "load_power": ((4, 0x310E, 2),),
+    "battery_voltage": ((4, 0x331A, 1),),
+    "battery_current": ((4, 0x331B, 2),),
+    "battery_power": ((4, 0x3106, 2),),
+    "battery_state_of_charge": ((4, 0x311A, 1),),
+    "battery_temperature": ((4, 0x3110, 1),),
+    "remote_battery_temperature": ((4, 0x311B, 1),),
+    "controller_temperature": ((4, 0x3111, 1),),
+    "battery_status": ((4, 0x3200, 1),),
+    "charging_equipment_status": ((4, 0x3201, 1),),
+    "discharging_equipment_status": ((4, 0x3202, 1),),
+    "day_time": ((2, 0x200C, 1),),
+    "night_time": ((2, 0x200C, 1),),
+    "maximum_battery_voltage_today": ((4, 0x3302, 1),),
+    "minimum_battery_voltage_today": ((4, 0x3303, 1),),
+    "maximum_pv_voltage_today": ((4, 0x3300, 1),),
+    "minimum_pv_voltage_today": ((4, 0x3301, 1),),
+    "device_over_temperature": ((2, 0x2000, 1),),
+    "consumed_energy_today": ((4, 0x3304, 2),),
+    "consumed_energy_this_month": ((4, 0x3306, 2),),
+    "consumed_energy_this_year": ((4, 0x3308, 2),),
+    "total_consumed_energy": ((4, 0x330A, 2),),
+    "generated_energy_today": ((4, 0x330C, 2),),
+    "generated_energy_this_month": ((4, 0x330E, 2),),
+    "generated_energy_this_year": ((4, 0x3310, 2),),
+    "total_generated_energy": ((4, 0x3312, 2),),
+    "current_device_time": ((3, 0x9013, 3),),
+    "rated_charging_current": ((4, 0x3005, 1),),
+    "rated_load_current": ((4, 0x300E, 1),),
+    "battery_real_rated_voltage": ((4, 0x311D, 1),),
+    "battery_type": ((3, 0x9000, 1),),
+    "battery_capacity": ((3, 0x9001, 1),),
+    "temperature_compensation_coefficient": ((3, 0x9002, 1),),
+    "over_voltage_disconnect_voltage": ((3, 0x9003, 1),),
+    "charging_limit_voltage": ((3, 0x9004, 1),),
+    "over_voltage_reconnect_voltage": ((3, 0x9005, 1),),
+    "equalize_charging_voltage": ((3, 0x9006, 1),),
+    "boost_charging_voltage": ((3, 0x9007, 1),),
+    "float_charging_voltage": ((3, 0x9008, 1),),
+    "boost_reconnect_charging_voltage": ((3, 0x9009, 1),),
+    "low_voltage_reconnect_voltage": ((3, 0x900A, 1),),
+    "under_voltage_recover_voltage": ((3, 0x900B, 1),),
+    "under_voltage_warning_voltage": ((3, 0x900C, 1),),
+    "low_voltage_disconnect_voltage": ((3, 0x900D, 1),),
+    "discharging_limit_voltage": ((3, 0x900E, 1),),
+    "battery_rated_voltage": ((3, 0x9067, 1),),
+    "default_load_on_off_in_manual_mode": ((3, 0x906A, 1),),
+    "equalize_duration": ((3, 0x906B, 1),),
+    "boost_duration": ((3, 0x906C, 1),),
+    "battery_discharge": ((3, 0x906D, 1),),
+    "battery_charge": ((3, 0x906E, 1),),
+    "charging_mode": ((3, 0x9070, 1),),
+}
+
+# (name, label, unit, getter) of the settings accepted by the set command.
+# Names that are also in battery_voltage_control_register_names are written
+# together with a single read-modify-write of the 0x9003 block.
+SETTINGS = (
+    ("time", "RTC value", "", "get_rtc"),
+    ("battery_capacity", "capacity", "AH", "get_battery_capacity"),
+    (
+        "temperature_compensation_coefficient",
+        "Temperature compensation coefficient",
+        "mV/°C/Cell",
+        "get_temperature_compensation_coefficient",
+    ),
+    (
+        "over_voltage_disconnect_voltage",
+        "over-voltage disconnect voltage",
+        "V",
+        "get_over_voltage_disconnect_voltage",
+    ),
+    (
+        "over_voltage_reconnect_voltage",
+        "over-voltage reconnect voltage",
+        "V",
+        "get_over_voltage_reconnect_voltage",
+    ),
+    (
+        "charging_limit_voltage",
+        "charging limit voltage",
+        "V",
+        "get_charging_limit_voltage",
+    ),
+    (
+        "discharging_limit_voltage",
+        "discharging limit voltage",
+        "V",
+        "get_discharging_limit_voltage",
+    ),
+    (
+        "boost_charging_voltage",
+        "boost charging voltage",
+        "V",
+        "get_boost_charging_voltage",
+    ),
+    (
+        "boost_reconnect_charging_voltage",
+        "boost reconnect charging voltage",
+        "V",
+        "get_boost_reconnect_charging_voltage",
+    ),
+    (
+        "equalize_charging_voltage",
+        "equalize charging voltage",
+        "V",
+        "get_equalize_charging_voltage",
+    ),
+    (
+        "float_charging_voltage",
+        "float charging voltage",
+        "V",
+        "get_float_charging_voltage",
+    ),
+    (
+        "low_voltage_disconnect_voltage",
+        "low-voltage disconnect voltage",
+        "V",
+        "get_low_voltage_disconnect_voltage",
+    ),
+    (
+        "low_voltage_reconnect_voltage",
+        "low voltage reconnect voltage",
+        "V",
+        "get_low_voltage_reconnect_voltage",
+    ),
+    (
+        "under_voltage_warning_voltage",
+        "under-voltage warning voltage",
+        "V",
+        "get_under_voltage_warning_voltage",
+    ),
+    (
+        "under_voltage_recover_voltage",
+        "under-voltage recover voltage",
+        "V",
+        "get_under_voltage_recover_voltage",
+    ),
+)
+
+SETTING_NAMES = tuple(name for name, _, _, _ in SETTINGS)
@@ -0,0 +1,217 @@
+"""Operations on many charge controllers at once
+
+Controllers sharing a serial port (a multi-drop RS-485 bus) are handled one
+after another, while separate ports are handled in parallel.
+"""
+import threading
+
+from epevermodbus.driver import EpeverChargeController
+
+
+def group_by_port(controllers):
+    """Controllers grouped by the name of their serial port"""
+    groups = {}
+    for controller in controllers:
+        groups.setdefault(controller.serial.port, []).append(controller)
+    return groups
+
+
+def run_per_port(controllers, operation):
+    """Runs *operation* on every controller, one thread per serial port
+
+    Returns a dict keyed by (port, slave address) of either the operation's
+    result or the exception it raised.
+    """
+    results = {}
+
+    def run(group):
+        for controller in group:
+            try:
+                result = operation(controller)
+            except Exception as error:
+                result = error
+            results[(controller.serial.port, controller.address)] = result
+
+    threads = [
+        threading.Thread(target=run, args=(group,))
+        for group in group_by_port(controllers).values()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def sync_rtcs(controllers):
+    """Sets the RTC of every controller with EpeverChargeController.sync_rtc
+
+    A port with several controllers gets one timed broadcast write, so
+    every unit on it lands on the same second boundary, followed by a read
+    back from each unit. The broadcast also sets any other unit on that
+    bus. A port with one controller gets a timed write to that unit.
+
+    Returns the sync_rtc result, including the residual drift, or the
+    exception raised, keyed by (port, slave address).
+    """
+    results = {}
+
+    def sync(group):
+        first = group[0]
+        writer = None
+        if len(group) > 1:
+            writer = EpeverChargeController(
+                first.serial, 0, first.serial.baudrate, scheduler=first.scheduler
+            )
+        try:
+            synced = first.sync_rtc(writer)
+        except Exception as error:
+            for controller in group:
+                results[_key(controller)] = error
+            return
+        results[_key(first)] = synced
+        latency = synced["round_trip_time"] / 2
+        for controller in group[1:]:
+            try:
+                drift = controller.get_rtc_drift(latency)
+                results[_key(controller)] = dict(synced, drift=drift)
+            except Exception as error:
+                results[_key(controller)] = error
+
+    threads = [
+        threading.Thread(target=sync, args=(group,))
+        for group in group_by_port(controllers).values()
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def _key(controller):
+    return (controller.serial.port, controller.address)
+
+
+def _broadcast(controllers, control_registers, results):
+    """Broadcasts the new settings to every port whose units agree on them
+
+    A full profile of all 12 registers is broadcast straight away. For a
+    partial one every unit is read first, and units on ports where a
+    broadcast would overwrite differing settings, or where a unit could not
+    be read, are returned to be written one by one. Broadcast failures are
+    stored in *results* for each unit.
+    """
+    names = controllers[0].battery_voltage_control_register_names
+    full = set(control_registers) == set(names)
+    current = {}
+    if not full:
+        current = run_per_port(
+            controllers,
+            lambda controller: controller.get_battery_voltage_control_registers(),
+        )
+    writers = {}
+    unicast = []
+    for group in group_by_port(controllers).values():
+        targets = []
+        for controller in group:
+            if full:
+                values = dict(control_registers)
+            else:
+                values = current[_key(controller)]
+                if isinstance(values, Exception):
+                    break
+                values.update(control_registers)
+            targets.append(controller.battery_voltage_control_register_values(values))
+        if len(targets) < len(group) or any(target != targets[0] for target in targets):
+            unicast.extend(group)
+            continue
+        writer = EpeverChargeController(
+            group[0].serial, 0, group[0].serial.baudrate, scheduler=group[0].scheduler
+        )
+        writers[writer.serial.port] = (writer, targets[0], group)
+
+    broadcasts = run_per_port(
+        [writer for writer, _, _ in writers.values()],
+        lambda writer: writer.write_registers(0x9003, writers[writer.serial.port][1]),
+    )
+    for (port, _), result in broadcasts.items():
+        if isinstance(result, Exception):
+            for controller in writers[port][2]:
+                results[_key(controller)] = result
+    return unicast
+
+
+def push_battery_voltage_control_registers(
+    controllers, control_registers, broadcast=False
+):
+    """Sets battery voltage control registers on every controller, then verifies them
+
+    Each unit gets a read-modify-write, so the registers left out keep the
+    values of that unit.
+
+    Transactions for N units on one port, including the read back:
+        * unicast: 3N (read, write and read back per unit)
+        * broadcast of all 12 registers: N + 1 (one write, N read backs)
+        * broadcast of fewer registers: 2N + 1 (every unit is read first to
+          check that they agree), or 3N when they do not and the port falls
+          back to unicast
+
+    Args:
+        * controllers: EpeverChargeController instances to push to
+        * control_registers (dict): values keyed by names in
+          battery_voltage_control_register_names
+        * broadcast (bool): write once per serial port to slave address 0
+          instead of once per controller, on ports where every unit would
+          end up with the same 12 registers. Other ports are written unit by
+          unit. Controllers do not answer a broadcast, so the write only
+          waits out the turnaround delay.
+
+    The requested registers of every unit are read back afterwards. Returns
+    a dict keyed by (port, slave address) of the mismatching registers as
+    {name: (expected, actual)}, empty when the push was verified, or of the
+    exception raised while writing or verifying that unit. A failing unit
+    does not stop the others.
+    """
+    controllers = list(controllers)
+    controllers[0].check_battery_voltage_control_registers(control_registers)
+
+    results = {}
+    unicast = (
+        _broadcast(controllers, control_registers, results)
+        if broadcast
+        else controllers
+    )
+    written = run_per_port(
+        unicast,
+        lambda controller: controller.set_battery_voltage_control_registers_dict(
+            control_registers
+        ),
+    )
+    results.update(
+        {
+            key: result
+            for key, result in written.items()
+            if isinstance(result, Exception)
+        }
+    )
+
+    def verify(controller):
+        actual = controller.get_battery_voltage_control_registers()
+        return {
+            name: (expected, actual[name])
+            for name, expected in control_registers.items()
+            if int(expected * 100) != int(round(actual[name] * 100))
+        }
+
+    results.update(
+        run_per_port(
+            [
+                controller
+                for controller in controllers
+                if _key(controller) not in results
+            ],
+            verify,
+        )
+    )
+    return results
@@ -0,0 +1,302 @@
+"""Modbus TCP gateway in front of controllers on one serial bus
+
+A poller thread reads REGISTER_BLOCKS from every controller into a register
+mirror, and any number of Modbus TCP clients are answered from that mirror
+without touching the serial port. Writes are passed through to the
+controller, after which the written blocks are read again. The controllers
+share a BusScheduler, so a write waits for the frame in flight rather than
+for the rest of a poll.
+
+Blocks that have not been polled successfully for *max_age* seconds are
+answered with a gateway target failed exception instead of stale values.
+"""
+import socketserver
+import struct
+import threading
+import time
+
+import minimalmodbus
+
+from epevermodbus.driver import REGISTER_BLOCKS
+from epevermodbus.scheduler import BusScheduler
+
+MBAP_HEADER = struct.Struct(">HHHB")
+
+ILLEGAL_FUNCTION = 1
+ILLEGAL_DATA_ADDRESS = 2
+ILLEGAL_DATA_VALUE = 3
+SLAVE_DEVICE_FAILURE = 4
+GATEWAY_TARGET_FAILED_TO_RESPOND = 0x0B
+
+
+class ModbusError(Exception):
+    """A Modbus exception code to send back to the client"""
+
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+
+
+def _pack_bits(values):
+    data = bytearray((len(values) + 7) // 8)
+    for index, value in enumerate(values):
+        if value:
+            data[index // 8] |= 1 << (index % 8)
+    return bytes([len(data)]) + bytes(data)
+
+
+def _unpack_bits(data, count):
+    return [data[index // 8] >> (index % 8) & 1 for index in range(count)]
+
+
+class ModbusTcpRequestHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            header = self._receive(MBAP_HEADER.size)
+            if header is None:
+                return
+            transaction_id, protocol_id, length, unit_id = MBAP_HEADER.unpack(header)
+            pdu = self._receive(length - 1)
+            if pdu is None or not pdu:
+                return
+            if protocol_id != 0:
+                continue
+
+            functioncode = pdu[0]
+            try:
+                response = bytes([functioncode]) + self.server.handle_pdu(
+                    unit_id, functioncode, pdu[1:]
+                )
+            except ModbusError as error:
+                response = bytes([functioncode | 0x80, error.code])
+            except Exception:
+                response = bytes([functioncode | 0x80, SLAVE_DEVICE_FAILURE])
+
+            self.request.sendall(
+                MBAP_HEADER.pack(transaction_id, 0, len(response) + 1, unit_id)
+                + response
+            )
+
+    def _receive(self, size):
+        data = b""
+        while len(data) < size:
+            chunk = self.request.recv(size - len(data))
+            if not chunk:
+                return None
+            data += chunk
+        return data
+
+
+class ModbusTcpGateway(socketserver.ThreadingTCPServer):
+    """Modbus TCP server answering reads from a polled register mirror
+
+    Args:
+        * address (tuple): (host, port) to listen on
+        * controllers: EpeverChargeController instances sharing one bus,
+          addressed by TCP clients with their slave address as unit id
+        * interval (float): seconds between polls of the controllers
+        * blocks: register blocks to mirror (default REGISTER_BLOCKS)
+        * max_age (float): seconds a block is served after its last
+          successful poll (default five intervals)
+    """
+
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(
+        self, address, controllers, interval=1.0, blocks=REGISTER_BLOCKS, max_age=None
+    ):
+        self.controllers = {
+            controller.address: controller for controller in controllers
+        }
+        self.interval = interval
+        self.max_age = 5 * interval if max_age is None else max_age
+        self.blocks = tuple(blocks)
+        self.registers = {address: {} for address in self.controllers}
+        # Guards registers, read_times and _versions. A block's version is
+        # bumped by every write to it, so a poll that started before the
+        # write does not put the old values back.
+        self.mirror_lock = threading.Lock()
+        self.read_times = {}
+        self._versions = {}
+        self._block_of = {}
+        for block in self.blocks:
+            functioncode, start, count = block
+            for offset in range(count):
+                self._block_of[(functioncode, start + offset)] = block
+        schedulers = [
+            controller.scheduler
+            for controller in self.controllers.values()
+            if controller.scheduler
+        ]
+        self.scheduler = schedulers[0] if schedulers else BusScheduler()
+        for controller in self.controllers.values():
+            controller.scheduler = self.scheduler
+        self._stop = threading.Event()
+        self._poller = None
+        super().__init__(address, ModbusTcpRequestHandler)
+
+    def poll(self):
+        """Reads every block of every controller into the mirror
+
+        A block that fails to read keeps its previous values.
+        """
+        for slaveaddress, controller in self.controllers.items():
+            for block in self.blocks:
+                self._refresh(slaveaddress, block)
+
+    def _refresh(self, slaveaddress, block):
+        controller = self.controllers[slaveaddress]
+        with self.mirror_lock:
+            version = self._versions.get((slaveaddress, block), 0)
+        try:
+            registers = controller.read_register_blocks([block])
+        except (IOError, ValueError):
+            return False
+        with self.mirror_lock:
+            if self._versions.get((slaveaddress, block), 0) != version:
+                # Written meanwhile, the values read may predate the write
+                return True
+            # Replaced rather than updated, so clients never see half a block
+            self.registers[slaveaddress] = {**self.registers[slaveaddress], **registers}
+            self.read_times[(slaveaddress, block)] = time.monotonic()
+        return True
+
+    def _poll_forever(self):
+        while not self._stop.is_set():
+            self.poll()
+            self._stop.wait(self.interval)
+
+    def start_polling(self):
+        """Polls once, then keeps polling on a daemon thread"""
+        self.poll()
+        self._poller = threading.Thread(target=self._poll_forever, daemon=True)
+        self._poller.start()
+
+    def server_close(self):
+        self._stop.set()
+        super().server_close()
+
+    def handle_pdu(self, unit_id, functioncode, data):
+        """Returns the response data for a request PDU or raises ModbusError"""
+        if unit_id not in self.controllers:
+            raise ModbusError(GATEWAY_TARGET_FAILED_TO_RESPOND)
+        if functioncode in (1, 2, 3, 4):
+            return self._read(unit_id, functioncode, data)
+        if functioncode in (5, 6, 15, 16):
+            return self._write(unit_id, functioncode, data)
+        raise ModbusError(ILLEGAL_FUNCTION)
+
+    def _read(self, unit_id, functioncode, data):
+        if len(data) != 4:
+            raise ModbusError(ILLEGAL_DATA_VALUE)
+        address, count = struct.unpack(">HH", data)
+        limit = 2000 if functioncode in (1, 2) else 125
+        if not 1 <= count <= limit:
+            raise ModbusError(ILLEGAL_DATA_VALUE)
+
+        mirror = self.registers[unit_id]
+        try:
+            values = [
+                mirror[(functioncode, address + offset)] for offset in range(count)
+            ]
+        except KeyError:
+            raise ModbusError(ILLEGAL_DATA_ADDRESS)
+
+        oldest = time.monotonic() - self.max_age
+        blocks = {
+            self._block_of[(functioncode, address + offset)] for offset in range(count)
+        }
+        if any(self.read_times.get((unit_id, block), 0) < oldest for block in blocks):
+            raise ModbusError(GATEWAY_TARGET_FAILED_TO_RESPOND)
+
+        if functioncode in (1, 2):
+            return _pack_bits(values)
+        return bytes([count * 2]) + struct.pack(f">{count}H", *values)
+
+    def _write(self, unit_id, functioncode, data):
+        controller = self.controllers[unit_id]
+        try:
+            address, value = struct.unpack(">HH", data[:4])
+            if functioncode == 5:
+                if value not in (0x0000, 0xFF00):
+                    raise ModbusError(ILLEGAL_DATA_VALUE)
+                readfunctioncode, values = 1, [int(value == 0xFF00)]
+                write = lambda: controller.write_bit(address, values[0], 5)
+            elif functioncode == 6:
+                readfunctioncode, values = 3, [value]
+                write = lambda: controller.write_register(address, value, 0, 6)
+            elif functioncode == 15:
+                readfunctioncode, values = 1, _unpack_bits(data[5:], value)
+                write = lambda: controller.write_bits(address, values)
+            else:
+                readfunctioncode = 3
+                values = list(struct.unpack(f">{value}H", data[5 : 5 + 2 * value]))
+                write = lambda: controller.write_registers(address, values)
+        except (struct.error, IndexError):
+            raise ModbusError(ILLEGAL_DATA_VALUE)
+
+        written = None
+        try:
+            write()
+            written = {
+                (readfunctioncode, address + offset): value
+                for offset, value in enumerate(values)
+            }
+        except minimalmodbus.IllegalRequestError:
+            raise ModbusError(ILLEGAL_DATA_ADDRESS)
+        except minimalmodbus.NoResponseError:
+            raise ModbusError(GATEWAY_TARGET_FAILED_TO_RESPOND)
+        except (IOError, ValueError):
+            raise ModbusError(SLAVE_DEVICE_FAILURE)
+        finally:
+            self._invalidate(unit_id, readfunctioncode, address, len(values), written)
+
+        return data[:4]
+
+    def _invalidate(self, unit_id, functioncode, address, count, written=None):
+        """Updates the mirrored blocks overlapping a write
+
+        The *written* values go into the mirror straight away, then the
+        blocks are read again. When a failed write leaves nothing known and
+        the blocks cannot be read, they are dropped from the mirror.
+        """
+        overlapping = [
+            block
+            for block in self.blocks
+            if block[0] == functioncode
+            and block[1] < address + count
+            and address < block[1] + block[2]
+        ]
+        with self.mirror_lock:
+            for block in overlapping:
+                self._versions[(unit_id, block)] = (
+                    self._versions.get((unit_id, block), 0) + 1
+                )
+            if written:
+                mirrored = {
+                    key: value
+                    for key, value in written.items()
+                    if key in self._block_of
+                }
+                self.registers[unit_id] = {**self.registers[unit_id], **mirrored}
+
+        for block in overlapping:
+            if self._refresh(unit_id, block) or written is not None:
+                continue
+            functioncode, start, block_count = block
+            dropped = {(functioncode, start + offset) for offset in range(block_count)}
+            with self.mirror_lock:
+                self.registers[unit_id] = {
+                    key: value
+                    for key, value in self.registers[unit_id].items()
+                    if key not in dropped
+                }
+                self.read_times.pop((unit_id, block), None)
+
+    def serve_in_background(self):
+        """Starts polling and serving on daemon threads"""
+        self.start_polling()
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,173 @@
+"""Recording raw registers, and serving the getters from a recording
+
+A recording is a JSON lines file with one snapshot of raw registers per
+line:
+
+    {"timestamp": 1628519415.2, "slaveaddress": 1, "registers": {"4:0x3100": 1850, ...}}
+
+ReplayController answers every getter of EpeverChargeController from a
+recording, decoding the registers the same way as live reads, so code and
+the command line utility can run without a serial port.
+"""
+import json
+import time
+
+import minimalmodbus
+
+from epevermodbus.driver import REGISTER_BLOCKS, RegisterSnapshot
+from epevermodbus.fields import FIELD_NAMES
+
+
+def encode_registers(registers):
+    """Registers keyed by (functioncode, address) as JSON object keys"""
+    return {
+        f"{functioncode}:{address:#06x}": value
+        for (functioncode, address), value in sorted(registers.items())
+    }
+
+
+def decode_registers(encoded):
+    """Registers keyed by (functioncode, address) from encode_registers"""
+    registers = {}
+    for key, value in encoded.items():
+        functioncode, _, address = key.partition(":")
+        registers[(int(functioncode), int(address, 0))] = value
+    return registers
+
+
+def write_snapshot(file, registers, timestamp, slaveaddress=1):
+    """Appends one snapshot of registers to an open recording"""
+    file.write(
+        json.dumps(
+            {
+                "timestamp": timestamp,
+                "slaveaddress": slaveaddress,
+                "registers": encode_registers(registers),
+            }
+        )
+        + "\n"
+    )
+
+
+def load_recording(path):
+    """The snapshots in the recording at *path* as (timestamp, slaveaddress, registers)"""
+    snapshots = []
+    with open(path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            snapshot = json.loads(line)
+            snapshots.append(
+                (
+                    snapshot.get("timestamp"),
+                    snapshot.get("slaveaddress", 1),
+                    decode_registers(snapshot["registers"]),
+                )
+            )
+    if not snapshots:
+        raise ValueError(f"No snapshots in {path}")
+    return snapshots
+
+
+def record_forever(controller, file, interval=1.0, count=None, blocks=REGISTER_BLOCKS):
+    """Reads *blocks* and appends them to an open recording, repeatedly
+
+    Blocks that fail to read are left out of that snapshot.
+    """
+    snapshots = 0
+    while count is None or snapshots < count:
+        started = time.monotonic()
+        timestamp = time.time()
+        registers = {}
+        for block in blocks:
+            try:
+                registers.update(controller.read_register_blocks([block]))
+            except (IOError, ValueError):
+                continue
+        write_snapshot(file, registers, timestamp, controller.address)
+        file.flush()
+        snapshots += 1
+        if count is None or snapshots < count:
+            time.sleep(max(0, interval - (time.monotonic() - started)))
+
+
+def _not_recorded(functioncode, address):
+    return minimalmodbus.IllegalRequestError(
+        f"Register {functioncode}:{address:#06x} is not in the recording"
+    )
+
+
+class ReplayController(RegisterSnapshot):
+    """Getters of EpeverChargeController served from recorded snapshots
+
+    Every get_snapshot call serves the next snapshot of the recording, and
+    the other getters read the snapshot served last. Reading a register
+    missing from the snapshot raises IllegalRequestError, as a device
+    without that register would, and so does every write.
+
+    Args:
+        * snapshots: (timestamp, slaveaddress, registers) tuples as
+          returned by load_recording
+        * loop (bool): start again from the first snapshot after the last
+          one, instead of raising EOFError (default False)
+    """
+
+    def __init__(self, snapshots, loop=False):
+        self.snapshots = list(snapshots)
+        self.loop = loop
+        self.position = 0
+        self.timestamp, slaveaddress, registers = self.snapshots[0]
+        super().__init__(registers, slaveaddress)
+
+    @classmethod
+    def from_file(cls, path, loop=False):
+        return cls(load_recording(path), loop)
+
+    def advance(self):
+        """Moves on to the next snapshot, raising EOFError after the last"""
+        if self.position >= len(self.snapshots):
+            if not self.loop:
+                raise EOFError("End of the recording")
+            self.position = 0
+        self.timestamp, self.address, self.registers = self.snapshots[self.position]
+        self.position += 1
+
+    def get_snapshot(self, names=FIELD_NAMES, deadline=5.0):
+        """Decodes the named fields from the next snapshot, see EpeverChargeController.get_snapshot
+
+        Timestamps are those of the recording.
+        """
+        self.advance()
+        snapshot = super().get_snapshot(names, deadline)
+        if self.timestamp is not None:
+            for reading in snapshot.values():
+                if reading["timestamp"] is not None:
+                    reading["timestamp"] = self.timestamp
+        return snapshot
+
+    def _perform_command(self, functioncode, payload_to_slave):
+        # Writes, and any other request not answered from the snapshot
+        raise minimalmodbus.IllegalRequestError(
+            f"Function code {functioncode} is not available in a recording"
+        )
+
+    def read_bit(self, registeraddress, functioncode=2):
+        return self.read_registers(registeraddress, 1, functioncode)[0]
+
+    def read_register(
+        self, registeraddress, number_of_decimals=0, functioncode=3, signed=False
+    ):
+        try:
+            return super().read_register(
+                registeraddress, number_of_decimals, functioncode, signed
+            )
+        except KeyError as error:
+            raise _not_recorded(*error.args[0]) from None
+
+    def read_registers(self, registeraddress, number_of_registers, functioncode=3):
+        try:
+            return super().read_registers(
+                registeraddress, number_of_registers, functioncode
+            )
+        except KeyError as error:
+            raise _not_recorded(*error.args[0]) from None
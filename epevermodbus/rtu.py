@@ -0,0 +1,191 @@
+"""Lightweight Modbus RTU transport for block reads
+
+minimalmodbus builds, checks and parses every frame with general purpose
+code. This transport only does reads (function codes 1 to 4): request
+frames are built once and cached, the CRC is table driven, and responses
+are read into one reused bytearray and parsed in place with struct.
+pyserial still copies the received bytes into that buffer, so this saves
+the per-frame allocations of minimalmodbus, not the copies.
+Errors are reported with the same exception classes as minimalmodbus, so
+retries and capability probing behave the same with either transport.
+"""
+import struct
+import time
+
+import minimalmodbus
+
+
+def _crc_table():
+    table = []
+    for byte in range(256):
+        crc = byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+        table.append(crc)
+    return tuple(table)
+
+
+CRC_TABLE = _crc_table()
+
+# Modbus RTU frames are separated by 3.5 character times of silence, with
+# 11 bits per character, and by at least 1.75 ms above 19200 baud
+SILENT_PERIOD_BITS = 3.5 * 11
+MINIMUM_SILENT_PERIOD = 0.00175
+
+REQUEST = struct.Struct(">BBHH")
+CRC = struct.Struct("<H")
+
+SLAVE_ERRORS = {
+    1: (minimalmodbus.IllegalRequestError, "Slave reported illegal function"),
+    2: (minimalmodbus.IllegalRequestError, "Slave reported illegal data address"),
+    3: (minimalmodbus.IllegalRequestError, "Slave reported illegal data value"),
+    6: (minimalmodbus.SlaveDeviceBusyError, "Slave reported device busy"),
+    7: (minimalmodbus.NegativeAcknowledgeError, "Slave reported negative acknowledge"),
+}
+
+
+# time.monotonic() of the latest response on each port, shared by the
+# transports on that port
+_latest_read_times = {}
+
+
+def silent_period(baudrate):
+    """Seconds of silence required between frames at *baudrate*"""
+    return max(SILENT_PERIOD_BITS / baudrate, MINIMUM_SILENT_PERIOD)
+
+
+def crc16(data, length=None):
+    """Modbus CRC-16 of the first *length* bytes of *data* (default all)"""
+    crc = 0xFFFF
+    table = CRC_TABLE
+    for byte in data[:length] if length is not None else data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+class RtuTransport:
+    """Reads coils, discrete inputs and registers over a serial port
+
+    Args:
+        * serial (serial.Serial): the open serial port
+        * slaveaddresses: slave addresses to precompute frames for
+        * blocks: (functioncode, address, count) reads to precompute frames
+          for; frames for other reads are built and cached on first use
+    """
+
+    def __init__(self, serial, slaveaddresses=(), blocks=()):
+        self.serial = serial
+        self.roundtrip_time = None
+        self._frames = {}
+        self._buffer = bytearray(256)
+        self._view = memoryview(self._buffer)
+        self._register_structs = {}
+        for slaveaddress in slaveaddresses:
+            for functioncode, address, count in blocks:
+                self.frame(slaveaddress, functioncode, address, count)
+
+    def frame(self, slaveaddress, functioncode, address, count):
+        """The request frame for a read, built on first use"""
+        key = (slaveaddress, functioncode, address, count)
+        frame = self._frames.get(key)
+        if frame is None:
+            request = REQUEST.pack(slaveaddress, functioncode, address, count)
+            frame = self._frames[key] = request + CRC.pack(crc16(request))
+        return frame
+
+    def read(self, slaveaddress, functioncode, address, count):
+        """Reads *count* registers, or bits for function codes 1 and 2
+
+        Returns a list of register values, or of 0/1 for bits.
+        """
+        if functioncode in (1, 2):
+            byte_count = (count + 7) // 8
+        elif functioncode in (3, 4):
+            byte_count = 2 * count
+        else:
+            raise ValueError(f"Function code {functioncode} is not a read")
+        response_size = 5 + byte_count
+        if response_size > len(self._buffer):
+            raise ValueError(f"Too many registers to read: {count}")
+
+        length = self._communicate(
+            self.frame(slaveaddress, functioncode, address, count), response_size
+        )
+        buffer = self._buffer
+
+        if length < 5:
+            raise minimalmodbus.NoResponseError(
+                "No communication with the instrument (no answer)"
+            )
+        if buffer[0] != slaveaddress:
+            raise minimalmodbus.InvalidResponseError(
+                f"Wrong return slave address: {buffer[0]} instead of {slaveaddress}"
+            )
+        if buffer[1] == functioncode | 0x80:
+            if crc16(buffer, 3) != CRC.unpack_from(buffer, 3)[0]:
+                raise minimalmodbus.InvalidResponseError(
+                    "CRC error in exception response"
+                )
+            exception, message = SLAVE_ERRORS.get(
+                buffer[2],
+                (
+                    minimalmodbus.SlaveReportedException,
+                    f"Slave reported error code {buffer[2]}",
+                ),
+            )
+            raise exception(message)
+        if length != response_size:
+            raise minimalmodbus.InvalidResponseError(
+                f"Wrong response length: {length} bytes instead of {response_size}"
+            )
+        if buffer[1] != functioncode or buffer[2] != byte_count:
+            raise minimalmodbus.InvalidResponseError(
+                "Wrong function code or byte count in response"
+            )
+        if (
+            crc16(buffer, response_size - 2)
+            != CRC.unpack_from(buffer, response_size - 2)[0]
+        ):
+            raise minimalmodbus.InvalidResponseError("CRC error in response")
+
+        if functioncode in (1, 2):
+            return [buffer[3 + index // 8] >> (index % 8) & 1 for index in range(count)]
+
+        register_struct = self._register_structs.get(count)
+        if register_struct is None:
+            register_struct = self._register_structs[count] = struct.Struct(
+                f">{count}H"
+            )
+        return list(register_struct.unpack_from(buffer, 3))
+
+    def wait_silent_period(self):
+        """Sleeps until the silent period since the last frame on the port has passed"""
+        since_read = time.monotonic() - _latest_read_times.get(
+            self.serial.port or "", 0
+        )
+        period = silent_period(self.serial.baudrate)
+        if since_read < period:
+            time.sleep(period - since_read)
+
+    def mark_read(self):
+        """Records that a response was just received on the port
+
+        Call this after transactions sent on the port by other means, such
+        as minimalmodbus, so that the next frame waits out the silent period.
+        """
+        _latest_read_times[self.serial.port or ""] = time.monotonic()
+
+    def _communicate(self, frame, response_size):
+        """Sends a frame and reads the response into the buffer, returns its length"""
+        serial = self.serial
+        if not serial.is_open:
+            serial.open()
+        serial.reset_input_buffer()
+        self.wait_silent_period()
+
+        write_time = time.monotonic()
+        serial.write(frame)
+        length = serial.readinto(self._view[:response_size])
+        self.mark_read()
+        self.roundtrip_time = time.monotonic() - write_time
+        return length or 0
@@ -0,0 +1,219 @@
+"""Threshold and alarm rules evaluated against register snapshots
+
+A rule compares a live field with a constant or with a device setting,
+for example battery_voltage below under_voltage_warning_voltage for 60 s.
+Rules are compiled once by a RuleEngine into the fields and register
+blocks they need. Each snapshot then costs one decode per field used and a
+comparison per rule, and never reads the bus: settings are decoded from the
+settings registers when a snapshot carries them and cached otherwise.
+
+A rule becomes active once its condition has held for *hold* seconds, and
+clears once the value is back past the threshold by *hysteresis*.
+Callbacks fire on those transitions only.
+"""
+import operator
+import time
+
+from epevermodbus.driver import RegisterSnapshot, blocks_for_fields
+from epevermodbus.fields import FIELD_GETTERS, FIELD_REGISTERS
+
+OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+def _registers_of(name):
+    return tuple(
+        (functioncode, address + offset)
+        for functioncode, address, count in FIELD_REGISTERS[name]
+        for offset in range(count)
+    )
+
+
+class Rule:
+    """A condition on a field, with hold time and hysteresis
+
+    Args:
+        * name (str): name passed to callbacks
+        * field (str): live field name, see epevermodbus.fields.FIELDS
+        * comparison (str): one of <, <=, > and >=
+        * threshold: a number, or the name of a field holding a device
+          setting such as "under_voltage_warning_voltage"
+        * hold (float): seconds the condition has to hold before the rule
+          becomes active (default 0)
+        * hysteresis (float): how far back past the threshold the value has
+          to go before an active rule clears (default 0)
+        * callback: called as callback(rule, active, value, timestamp) when
+          the rule becomes active or clears
+    """
+
+    def __init__(
+        self,
+        name,
+        field,
+        comparison,
+        threshold,
+        hold=0.0,
+        hysteresis=0.0,
+        callback=None,
+    ):
+        if field not in FIELD_GETTERS:
+            raise ValueError(f"Unknown field: {field}")
+        if comparison not in OPERATORS:
+            raise ValueError(f"Unknown comparison: {comparison}")
+        if isinstance(threshold, str) and threshold not in FIELD_GETTERS:
+            raise ValueError(f"Unknown setting: {threshold}")
+        self.name = name
+        self.field = field
+        self.comparison = comparison
+        self.threshold = threshold
+        self.hold = hold
+        self.hysteresis = hysteresis
+        self.callback = callback
+        self.active = False
+        self._since = None
+
+    def update(self, value, threshold, timestamp):
+        """Feeds one value, returns True if the rule became active or cleared"""
+        compare = OPERATORS[self.comparison]
+        if self.active:
+            # Clears once the value is hysteresis past the threshold
+            if self.comparison in ("<", "<="):
+                cleared = not compare(value, threshold + self.hysteresis)
+            else:
+                cleared = not compare(value, threshold - self.hysteresis)
+            if cleared:
+                self.active = False
+                self._since = None
+                return True
+            return False
+
+        if not compare(value, threshold):
+            self._since = None
+            return False
+        if self._since is None:
+            self._since = timestamp
+        if timestamp - self._since >= self.hold:
+            self.active = True
+            return True
+        return False
+
+    def reset(self):
+        """Forgets the rule's state, as if no value had been seen"""
+        self.active = False
+        self._since = None
+
+
+class RuleEngine:
+    """Evaluates rules against register snapshots
+
+    Args:
+        * rules: Rule instances
+        * callback: called as callback(rule, active, value, timestamp) for
+          every transition of a rule without a callback of its own
+    """
+
+    def __init__(self, rules, callback=None):
+        self.rules = list(rules)
+        self.callback = callback
+        self.settings = {}
+        # Whether load_settings was tried, even if it failed or some
+        # settings are not supported by the device
+        self.settings_loaded = False
+
+        live = []
+        settings = []
+        for rule in self.rules:
+            if rule.field not in live:
+                live.append(rule.field)
+            if isinstance(rule.threshold, str) and rule.threshold not in settings:
+                settings.append(rule.threshold)
+
+        # Getters looked up once, called on a shared snapshot per evaluation
+        self._live_getters = [
+            (name, getattr(RegisterSnapshot, FIELD_GETTERS[name])) for name in live
+        ]
+        self._setting_getters = [
+            (name, getattr(RegisterSnapshot, FIELD_GETTERS[name]), _registers_of(name))
+            for name in settings
+        ]
+        self._setting_registers = {}
+        self.blocks = blocks_for_fields(live)
+        self.setting_blocks = blocks_for_fields(settings)
+
+    def update_settings(self, registers):
+        """Decodes the settings the rules use from *registers* into the cache
+
+        Settings whose registers are missing or unchanged are left as they are.
+        """
+        snapshot = None
+        for name, getter, keys in self._setting_getters:
+            try:
+                raw = tuple(registers[key] for key in keys)
+            except KeyError:
+                continue
+            if self._setting_registers.get(name) != raw:
+                snapshot = snapshot or RegisterSnapshot(registers)
+                self.settings[name] = getter(snapshot)
+                self._setting_registers[name] = raw
+
+    def load_settings(self, controller):
+        """Reads the settings the rules use from *controller*"""
+        self.settings_loaded = True
+        self.update_settings(controller.read_register_blocks(self.setting_blocks))
+
+    def evaluate(self, registers, timestamp=None):
+        """Feeds a snapshot of registers to every rule
+
+        Args:
+            * registers (dict): register values keyed by (functioncode,
+              address), as returned by read_register_blocks
+            * timestamp (float): time of the snapshot in seconds (default
+              time.monotonic())
+
+        Returns the rules that became active or cleared, after calling
+        their callbacks. Rules whose field or setting is missing from the
+        snapshot and the cache keep their state.
+        """
+        if timestamp is None:
+            timestamp = time.monotonic()
+        if self._setting_getters:
+            self.update_settings(registers)
+
+        snapshot = RegisterSnapshot(registers)
+        values = {}
+        for name, getter in self._live_getters:
+            try:
+                values[name] = getter(snapshot)
+            except KeyError:
+                continue
+
+        transitions = []
+        settings = self.settings
+        for rule in self.rules:
+            value = values.get(rule.field)
+            threshold = rule.threshold
+            if isinstance(threshold, str):
+                threshold = settings.get(threshold)
+            if value is None or threshold is None:
+                continue
+            if rule.update(value, threshold, timestamp):
+                transitions.append(rule)
+                callback = rule.callback or self.callback
+                if callback is not None:
+                    callback(rule, rule.active, value, timestamp)
+        return transitions
+
+    def poll(self, controller, timestamp=None):
+        """Reads the blocks the rules use from *controller* and evaluates them
+
+        Settings are read on the first poll only, even when some of them
+        are missing or the read fails; call load_settings again after
+        changing them on the device.
+        """
+        if self._setting_getters and not self.settings_loaded:
+            self.load_settings(controller)
+        return self.evaluate(controller.read_register_blocks(self.blocks), timestamp)
@@ -0,0 +1,116 @@
+"""Discovery of charge controllers, their slave addresses and baud rates
+
+Every port is scanned on its own thread. On each port the common baud rates
+are tried in turn, sweeping slave addresses with a single short probe per
+address and no retries. A sweep stops early once *max_misses* addresses
+in a row (16 by default) have not answered after a controller was found,
+as controllers on a bus usually have neighbouring addresses. A port is
+done as soon as one baud rate finds a controller, since every controller
+on a bus shares its baud rate.
+"""
+import concurrent.futures
+import glob
+
+from epevermodbus.driver import EpeverChargeController, RegisterSnapshot
+
+PORT_PATTERNS = ("/dev/ttyUSB*", "/dev/ttyXRUSB*")
+
+COMMON_BAUDRATES = (115200, 9600, 19200, 38400, 57600)
+
+DEFAULT_MAX_MISSES = 16
+
+
+def find_ports():
+    """Serial ports that could have a charge controller attached"""
+    return sorted(port for pattern in PORT_PATTERNS for port in glob.glob(pattern))
+
+
+def probe(controller, slaveaddress):
+    """Rated data of the controller at *slaveaddress*, or None if it does not answer"""
+    controller.address = slaveaddress
+    try:
+        values = controller.read_registers(0x3000, 9, 4)
+    except (IOError, ValueError):
+        return None
+    registers = {(4, 0x3000 + offset): value for offset, value in enumerate(values)}
+    return RegisterSnapshot(registers, slaveaddress).get_rated_data()
+
+
+def scan_port(
+    port,
+    baudrates=COMMON_BAUDRATES,
+    addresses=range(1, 248),
+    timeout=0.1,
+    max_misses=DEFAULT_MAX_MISSES,
+):
+    """Finds the controllers answering on one serial port
+
+    Args:
+        * port: port name, or an open serial.Serial
+        * baudrates: baud rates to try, in order
+        * addresses: slave addresses to sweep, in order
+        * timeout (float): seconds to wait for each probe
+        * max_misses (int): stop a sweep after this many addresses in a row
+          do not answer, counted from the last controller found. Addresses
+          before the first controller are always swept. None sweeps every
+          address (default 16)
+
+    Returns a list of dicts with the port, baudrate, slaveaddress and the
+    rated data of each controller found.
+    """
+    controller = EpeverChargeController(port, addresses[0], baudrates[0])
+    controller.serial.timeout = timeout
+    found = []
+
+    try:
+        for baudrate in baudrates:
+            controller.serial.baudrate = baudrate
+            misses = 0
+            for slaveaddress in addresses:
+                rated_data = probe(controller, slaveaddress)
+                if rated_data is None:
+                    misses += 1
+                    if max_misses is not None and found and misses >= max_misses:
+                        break
+                    continue
+                misses = 0
+                found.append(
+                    dict(
+                        port=controller.serial.port,
+                        baudrate=baudrate,
+                        slaveaddress=slaveaddress,
+                        **rated_data,
+                    )
+                )
+            if found:
+                break
+    finally:
+        if isinstance(port, str):
+            controller.serial.close()
+
+    return found
+
+
+def scan(ports=None, **kwargs):
+    """Finds the controllers on every port in parallel
+
+    Args:
+        * ports: port names (default find_ports())
+        * keyword arguments are passed on to scan_port
+
+    Returns the controllers found on all ports, see scan_port.
+    """
+    if ports is None:
+        ports = find_ports()
+    if not ports:
+        return []
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(ports)) as executor:
+        futures = [executor.submit(scan_port, port, **kwargs) for port in ports]
+        found = []
+        for future in futures:
+            try:
+                found.extend(future.result())
+            except (IOError, ValueError):
+                continue
+    return found
@@ -0,0 +1,142 @@
+"""Priority scheduling of transactions on a shared serial bus
+
+Controllers on one bus share a BusScheduler. Each transaction waits for the
+bus on its own, so a long sweep gives the bus up between frames, and the
+waiting transaction of the most urgent class goes next. A control write
+issued during a sweep therefore waits at most for the frame in flight, not
+for the rest of the sweep.
+
+Transactions are classified by function code and register address, and a
+thread can raise or lower the class of everything it sends with
+BusScheduler.priority. Waiting transactions age: each *aging* seconds of
+waiting moves one up a class, so a steady stream of urgent traffic delays
+settings reads but cannot starve them.
+"""
+import contextlib
+import itertools
+import threading
+import time
+
+CONTROL = 0
+ALARM = 1
+REALTIME = 2
+SETTINGS = 3
+
+PRIORITY_NAMES = {
+    CONTROL: "control",
+    ALARM: "alarm",
+    REALTIME: "realtime",
+    SETTINGS: "settings",
+}
+
+# Battery, charging and discharging equipment status words
+STATUS_REGISTERS = range(0x3200, 0x3203)
+
+WRITE_FUNCTIONCODES = (5, 6, 15, 16)
+
+
+def classify(functioncode, address=None):
+    """The priority class of a transaction
+
+    Writes are CONTROL, reads of the status words ALARM, reads of holding
+    registers SETTINGS and every other read REALTIME.
+    """
+    if functioncode in WRITE_FUNCTIONCODES:
+        return CONTROL
+    if functioncode == 4 and address in STATUS_REGISTERS:
+        return ALARM
+    if functioncode == 3:
+        return SETTINGS
+    return REALTIME
+
+
+class BusScheduler:
+    """Grants a serial bus to one transaction at a time, most urgent first
+
+    Waiting transactions are served by priority class (lowest value first)
+    and in arrival order within a class. A thread holding the bus can nest
+    transactions, so a sequence that has to go out back to back, such as a
+    timed write, can hold the bus for all of its frames.
+
+    Args:
+        * aging (float): seconds of waiting after which a transaction is
+          served as if it were one class more urgent, up to CONTROL, or None
+          to never age (default 1.0)
+    """
+
+    def __init__(self, aging=1.0):
+        self.aging = aging
+        self._condition = threading.Condition()
+        self._busy = False
+        self._waiting = []
+        self._granted = None
+        self._sequence = itertools.count()
+        self._local = threading.local()
+        self.statistics = {
+            priority: {"count": 0, "max_wait": 0.0} for priority in PRIORITY_NAMES
+        }
+
+    @contextlib.contextmanager
+    def priority(self, priority):
+        """Sends every transaction of this thread in the block with *priority*"""
+        previous = getattr(self._local, "priority", None)
+        self._local.priority = priority
+        try:
+            yield
+        finally:
+            self._local.priority = previous
+
+    def priority_for(self, functioncode, address=None):
+        """The class of a transaction sent from this thread"""
+        priority = getattr(self._local, "priority", None)
+        return classify(functioncode, address) if priority is None else priority
+
+    def _next(self):
+        """The waiting ticket to grant the bus to, with aging applied"""
+        now = time.monotonic()
+
+        def rank(ticket):
+            priority, sequence, arrival = ticket
+            if self.aging:
+                priority = max(CONTROL, priority - int((now - arrival) / self.aging))
+            return priority, sequence
+
+        return min(self._waiting, key=rank)
+
+    @contextlib.contextmanager
+    def transaction(self, priority):
+        """Holds the bus for one transaction of class *priority*
+
+        Transactions nested in it on the same thread go out straight away.
+        """
+        if getattr(self._local, "holding", False):
+            yield
+            return
+        with self._condition:
+            ticket = (priority, next(self._sequence), time.monotonic())
+            waited = 0.0
+            if self._busy:
+                # The bus is handed over on release, see below
+                self._waiting.append(ticket)
+                while self._granted is not ticket:
+                    self._condition.wait()
+                self._granted = None
+                waited = time.monotonic() - ticket[2]
+            self._busy = True
+            statistics = self.statistics.setdefault(
+                priority, {"count": 0, "max_wait": 0.0}
+            )
+            statistics["count"] += 1
+            statistics["max_wait"] = max(statistics["max_wait"], waited)
+        self._local.holding = True
+        try:
+            yield
+        finally:
+            self._local.holding = False
+            with self._condition:
+                if self._waiting:
+                    self._granted = self._next()
+                    self._waiting.remove(self._granted)
+                    self._condition.notify_all()
+                else:
+                    self._busy = False
@@ -0,0 +1,103 @@
+"""Local HTTP server serving readings as JSON
+
+Every request is answered from a RegisterCache, so the bus is read at most
+once per block per *max_age* however many clients there are.
+
+Endpoints:
+    * ``GET /snapshot`` all fields, or ``/snapshot?fields=a,b`` some of them.
+      Fields that cannot be read, such as registers the device does not
+      have, are null and listed with the reason under "errors"
+    * ``GET /fields/<name>`` a single field
+"""
+import datetime
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from epevermodbus.cache import RegisterCache
+from epevermodbus.fields import FIELD_NAMES
+
+
+def _json_default(value):
+    if isinstance(value, datetime.datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class SnapshotRequestHandler(BaseHTTPRequestHandler):
+    server_version = "epevermodbus"
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+
+        if url.path == "/snapshot":
+            names = [
+                name
+                for value in parse_qs(url.query).get("fields", [])
+                for name in value.split(",")
+                if name
+            ] or list(FIELD_NAMES)
+        elif url.path.startswith("/fields/"):
+            names = [url.path[len("/fields/") :]]
+        else:
+            self.send_json(404, {"error": f"Unknown path {url.path}"})
+            return
+
+        unknown = [name for name in names if name not in FIELD_NAMES]
+        if unknown:
+            self.send_json(404, {"error": f"Unknown field {unknown[0]}"})
+            return
+
+        try:
+            snapshot = self.server.cache.get_snapshot(names)
+        except (IOError, ValueError) as error:
+            self.send_json(503, {"error": str(error)})
+            return
+
+        values = {name: reading["value"] for name, reading in snapshot.items()}
+        errors = {
+            name: reading["error"]
+            for name, reading in snapshot.items()
+            if reading["status"] != "ok"
+        }
+        if url.path.startswith("/fields/") and errors:
+            status = 404 if snapshot[names[0]]["status"] == "unsupported" else 503
+            self.send_json(status, {"error": errors[names[0]]})
+        elif errors:
+            self.send_json(200, dict(values, errors=errors))
+        else:
+            self.send_json(200, values)
+
+    def send_json(self, status, body):
+        data = json.dumps(body, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SnapshotServer(ThreadingHTTPServer):
+    """HTTP server answering from a RegisterCache over one controller
+
+    Args:
+        * address (tuple): (host, port) to listen on
+        * controller (EpeverChargeController): controller to read from
+        * max_age (float): seconds a reading may be served from the cache
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, controller, max_age=1.0):
+        self.cache = RegisterCache(controller, max_age=max_age)
+        super().__init__(address, SnapshotRequestHandler)
+
+    def serve_in_background(self):
+        """Starts serving on a daemon thread and returns the thread"""
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return thread
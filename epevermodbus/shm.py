@@ -0,0 +1,289 @@
+"""Publishing raw register blocks to a memory mapped file
+
+The poller writes the latest register blocks into a fixed layout file, by
+default in ``/dev/shm`` so that it lives in shared memory, and local
+processes map the same file to read them without touching the serial port.
+A seqlock-style sequence number makes readers retry instead of seeing a
+half written snapshot: it is odd while the publisher is writing.
+
+Layout (little endian)::
+
+    header      magic "EPMB", layout version (u32), sequence (u64),
+                number of blocks (u32), reserved (u32)
+    block table per block: functioncode (u8), pad, start address (u16),
+                number of registers (u16), pad, data offset (u32)
+    data        per block: read time (f64, 0 if never read), validity mask
+                (one bit per register, least significant first, padded to
+                whole bytes), registers (u16 each, 0 where not valid)
+"""
+import mmap
+import os
+import struct
+import time
+
+from epevermodbus.driver import REGISTER_BLOCKS, RegisterSnapshot
+from epevermodbus.fields import FIELD_NAMES
+
+DEFAULT_PATH = "/dev/shm/epevermodbus"
+
+MAGIC = b"EPMB"
+LAYOUT_VERSION = 2
+HEADER = struct.Struct("<4sIQII")
+BLOCK_ENTRY = struct.Struct("<BxHHxxI")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+READ_TIME = struct.Struct("<d")
+
+
+def _mask_size(count):
+    return (count + 7) // 8
+
+
+def _block_struct(count):
+    return struct.Struct(f"<d{_mask_size(count)}s{count}H")
+
+
+def _layout(blocks):
+    """Data offsets of each block and the total size of the file"""
+    offset = HEADER.size + BLOCK_ENTRY.size * len(blocks)
+    offsets = []
+    for _, _, count in blocks:
+        offsets.append(offset)
+        offset += _block_struct(count).size
+    return offsets, offset
+
+
+class SnapshotPublisher:
+    """Writes register blocks into a memory mapped snapshot file
+
+    Args:
+        * path (str): file to publish to (default /dev/shm/epevermodbus)
+        * blocks: register blocks the file has room for (default all)
+    """
+
+    def __init__(self, path=DEFAULT_PATH, blocks=REGISTER_BLOCKS):
+        self.path = path
+        self.blocks = tuple(blocks)
+        self.offsets, size = _layout(self.blocks)
+        self._structs = [_block_struct(count) for _, _, count in self.blocks]
+
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # Never shrunk: a reader still attached to a larger layout would
+            # fault reading past the end of the file
+            size = max(size, os.fstat(fd).st_size)
+            os.ftruncate(fd, size)
+            self._map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        # Readers may still be attached to a previous publisher's file, so
+        # the sequence carries on from it and is odd while the file is reset
+        self.sequence = 0
+        if self._map[: len(MAGIC)] == MAGIC:
+            self.sequence = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+        self.sequence |= 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+
+        data_start = SEQUENCE_OFFSET + SEQUENCE.size
+        self._map[data_start:size] = bytes(size - data_start)
+        HEADER.pack_into(
+            self._map, 0, MAGIC, LAYOUT_VERSION, self.sequence, len(self.blocks), 0
+        )
+        for index, (block, offset) in enumerate(zip(self.blocks, self.offsets)):
+            functioncode, address, count = block
+            BLOCK_ENTRY.pack_into(
+                self._map,
+                HEADER.size + index * BLOCK_ENTRY.size,
+                functioncode,
+                address,
+                count,
+                offset,
+            )
+
+        self.sequence += 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+
+    def publish(self, registers, read_time):
+        """Publishes the registers of every block present in *registers*
+
+        Registers missing from a block, such as ones the device does not
+        have, are marked invalid. Blocks with no register present keep
+        their previous contents.
+
+        Args:
+            * registers (dict): values keyed by (functioncode, address), as
+              returned by EpeverChargeController.read_register_blocks
+            * read_time (float): time.time() of the read
+        """
+        self.sequence += 1
+        SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+
+        try:
+            for (functioncode, address, count), offset, block_struct in zip(
+                self.blocks, self.offsets, self._structs
+            ):
+                values = []
+                mask = 0
+                for index in range(count):
+                    value = registers.get((functioncode, address + index))
+                    if value is None:
+                        values.append(0)
+                    else:
+                        values.append(value)
+                        mask |= 1 << index
+                if not mask:
+                    continue
+                block_struct.pack_into(
+                    self._map,
+                    offset,
+                    read_time,
+                    mask.to_bytes(_mask_size(count), "little"),
+                    *values,
+                )
+        finally:
+            # Even again however the write ended, or readers would wait forever
+            self.sequence += 1
+            SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+
+    def close(self):
+        self._map.close()
+
+
+class SnapshotReader:
+    """Reads consistent snapshots published by a SnapshotPublisher
+
+    The block table is parsed once when the file is opened, after which
+    each read is a copy of the mapped file, a sequence check and a check
+    that the layout is still the one parsed. A publisher restarted with
+    other blocks makes reads raise ValueError; open a new reader then.
+
+    Args:
+        * path (str): file to read from (default /dev/shm/epevermodbus)
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            self._map = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+
+        magic, version, _, block_count, _ = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version != LAYOUT_VERSION:
+            raise ValueError(
+                f"{path} is not an epevermodbus snapshot (version {LAYOUT_VERSION})"
+            )
+
+        self.blocks = []
+        offsets = []
+        for index in range(block_count):
+            functioncode, address, count, offset = BLOCK_ENTRY.unpack_from(
+                self._map, HEADER.size + index * BLOCK_ENTRY.size
+            )
+            self.blocks.append((functioncode, address, count))
+            offsets.append(offset)
+
+        self._structs = [
+            (_block_struct(count), offset)
+            for (_, _, count), offset in zip(self.blocks, offsets)
+        ]
+        self._table_end = HEADER.size + BLOCK_ENTRY.size * block_count
+        self._size = max(
+            [self._table_end]
+            + [offset + block_struct.size for block_struct, offset in self._structs]
+        )
+        # The header but for the sequence number, and the block table
+        self._head = self._map[:SEQUENCE_OFFSET]
+        self._table = self._map[SEQUENCE_OFFSET + SEQUENCE.size : self._table_end]
+
+    def _layout_changed(self, data):
+        return (
+            data[:SEQUENCE_OFFSET] != self._head
+            or data[SEQUENCE_OFFSET + SEQUENCE.size : self._table_end] != self._table
+        )
+
+    def _layout_error(self):
+        return ValueError(
+            f"The layout of {self.path} has changed, open a new SnapshotReader"
+        )
+
+    def read_raw(self, max_attempts=10000):
+        """Returns the sequence number and a consistent copy of the file
+
+        Raises ValueError if the publisher restarted with another layout.
+        """
+        for _ in range(max_attempts):
+            sequence = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0]
+            if sequence & 1:
+                continue
+            if self._map.size() < self._size:
+                # Copying would read past the end of the file
+                raise self._layout_error()
+            data = self._map[: self._size]
+            if SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)[0] == sequence:
+                if self._layout_changed(data):
+                    raise self._layout_error()
+                return sequence, data
+        raise TimeoutError("Snapshot is being written, no consistent copy")
+
+    def read(self):
+        """Returns (read times by block, registers by (functioncode, address))
+
+        Blocks that were never published and registers marked invalid are
+        left out.
+        """
+        _, data = self.read_raw()
+        read_times = {}
+        registers = {}
+        for block, (block_struct, offset) in zip(self.blocks, self._structs):
+            read_time, mask, *values = block_struct.unpack_from(data, offset)
+            if not read_time:
+                continue
+            functioncode, address, _ = block
+            mask = int.from_bytes(mask, "little")
+            read_times[block] = read_time
+            for index, value in enumerate(values):
+                if mask >> index & 1:
+                    registers[(functioncode, address + index)] = value
+        return read_times, registers
+
+    def get_snapshot(self, names=FIELD_NAMES):
+        """The named fields of the latest snapshot with a status each
+
+        See EpeverChargeController.get_snapshot. Fields whose registers
+        were not published are "unsupported".
+        """
+        read_times, registers = self.read()
+        return RegisterSnapshot(registers).get_readings(names, read_times)
+
+    def get_fields(self, names=FIELD_NAMES):
+        """Decodes the named fields from the latest snapshot
+
+        Fields whose registers were not published are left out.
+        """
+        return {
+            name: reading["value"]
+            for name, reading in self.get_snapshot(names).items()
+            if reading["status"] == "ok"
+        }
+
+    def close(self):
+        self._map.close()
+
+
+def publish_forever(controller, publisher, interval=1.0):
+    """Reads every block the publisher has room for and publishes it, repeatedly
+
+    A failed read is skipped, leaving the previous snapshot in place.
+    """
+    while True:
+        started = time.monotonic()
+        read_time = time.time()
+        try:
+            registers = controller.read_register_blocks(publisher.blocks)
+        except (IOError, ValueError):
+            registers = {}
+        publisher.publish(registers, read_time)
+        time.sleep(max(0, interval - (time.monotonic() - started)))
@@ -16,7 +16,7 @@ setup(
     ],
     packages=["epevermodbus"],
     include_package_data=True,
-    install_requires=["minimalmodbus", "retrying"],
+    install_requires=["minimalmodbus>=2.1", "retrying"],
     test_suite="test",
     entry_points={
         "console_scripts": [
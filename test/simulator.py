@@ -0,0 +1,247 @@
+import struct
+import threading
+
+
+def crc16(data):
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            if crc & 1:
+                crc = (crc >> 1) ^ 0xA001
+            else:
+                crc >>= 1
+    return struct.pack("<H", crc)
+
+
+# Register values of a Tracer AN on a sunny afternoon, keyed by (functioncode, address)
+DEFAULT_REGISTERS = {
+    # Only documented coils and discrete inputs, the gaps are illegal addresses
+    **{(1, address): 0 for address in (0, 1, 2, 3, 5, 6)},
+    (1, 0x0002): 1,
+    (2, 0x2000): 0,
+    (2, 0x200C): 0,
+    (4, 0x3000): 10000,
+    (4, 0x3001): 2000,
+    (4, 0x3002): 0x4E20,
+    (4, 0x3003): 0,
+    (4, 0x3004): 1200,
+    (4, 0x3005): 2000,
+    (4, 0x3006): 0x4E20,
+    (4, 0x3007): 0,
+    (4, 0x3008): 1,
+    (4, 0x300E): 2000,
+    (4, 0x3100): 1850,
+    (4, 0x3101): 520,
+    (4, 0x3102): 9620,
+    (4, 0x3103): 0,
+    (4, 0x3104): 1330,
+    (4, 0x3105): 690,
+    (4, 0x3106): 9177,
+    (4, 0x3107): 0,
+    (4, 0x310C): 1325,
+    (4, 0x310D): 100,
+    (4, 0x310E): 1325,
+    (4, 0x310F): 0,
+    (4, 0x3110): 2150,
+    (4, 0x3111): 0xFF38,  # -2.0 °C
+    (4, 0x311A): 86,
+    (4, 0x311B): 0,
+    (4, 0x311D): 1200,
+    (4, 0x3200): 0,
+    (4, 0x3201): 0b1001,
+    (4, 0x3202): 1,
+    **{(4, 0x3300 + offset): 0 for offset in range(20)},
+    (4, 0x3300): 2010,
+    (4, 0x3301): 12,
+    (4, 0x3302): 1450,
+    (4, 0x3303): 1290,
+    (4, 0x3304): 123,
+    (4, 0x3312): 0x86A0,
+    (4, 0x3313): 0x1,
+    (4, 0x331A): 1330,
+    (4, 0x331B): 0xFF9C,  # -1.00 A, low word
+    (4, 0x331C): 0xFFFF,
+    (3, 0x9000): 0,
+    (3, 0x9001): 40,
+    (3, 0x9002): 300,
+    (3, 0x9003): 1470,
+    (3, 0x9004): 1460,
+    (3, 0x9005): 1460,
+    (3, 0x9006): 1440,
+    (3, 0x9007): 1460,
+    (3, 0x9008): 1360,
+    (3, 0x9009): 1330,
+    (3, 0x900A): 1150,
+    (3, 0x900B): 1160,
+    (3, 0x900C): 1150,
+    (3, 0x900D): 1100,
+    (3, 0x900E): 1050,
+    (3, 0x9013): 30 << 8 | 15,  # 14:30:15 on 2021-08-09
+    (3, 0x9014): 9 << 8 | 14,
+    (3, 0x9015): 21 << 8 | 8,
+    (3, 0x9067): 1,
+    (3, 0x906A): 0,
+    (3, 0x906B): 0,
+    (3, 0x906C): 180,
+    (3, 0x906D): 30,
+    (3, 0x906E): 100,
+    (3, 0x9070): 0,
+}
+
+
+class SimulatedController:
+    """Register map of one charge controller on a simulated bus"""
+
+    def __init__(
+        self,
+        registers=None,
+        identification=(b"EPsolar", b"Tracer2210AN", b"V02.13+V07.23"),
+    ):
+        self.registers = dict(DEFAULT_REGISTERS if registers is None else registers)
+        self.identification = identification
+
+    def handle(self, functioncode, payload):
+        """Returns the response payload, or an exception code as an int"""
+        if functioncode == 43:
+            if self.identification is None:
+                return 1
+            objects = b"".join(
+                bytes([object_id, len(value)]) + value
+                for object_id, value in enumerate(self.identification)
+            )
+            return (
+                bytes([0x0E, 0x01, 0x01, 0x00, 0x00, len(self.identification)])
+                + objects
+            )
+
+        if functioncode in (1, 2, 3, 4):
+            address, count = struct.unpack(">HH", payload[:4])
+            try:
+                values = [
+                    self.registers[(functioncode, address + offset)]
+                    for offset in range(count)
+                ]
+            except KeyError:
+                return 2
+            if functioncode in (1, 2):
+                data = bytearray((count + 7) // 8)
+                for offset, value in enumerate(values):
+                    data[offset // 8] |= bool(value) << (offset % 8)
+                return bytes([len(data)]) + bytes(data)
+            return bytes([count * 2]) + struct.pack(f">{count}H", *values)
+
+        if functioncode == 5:
+            address, value = struct.unpack(">HH", payload[:4])
+            if (1, address) not in self.registers:
+                return 2
+            self.registers[(1, address)] = int(value == 0xFF00)
+            return payload[:4]
+
+        if functioncode == 6:
+            address, value = struct.unpack(">HH", payload[:4])
+            if (3, address) not in self.registers:
+                return 2
+            self.registers[(3, address)] = value
+            return payload[:4]
+
+        if functioncode == 15:
+            address, count = struct.unpack(">HH", payload[:4])
+            data = payload[5:]
+            if any(
+                (1, address + offset) not in self.registers for offset in range(count)
+            ):
+                return 2
+            for offset in range(count):
+                self.registers[(1, address + offset)] = (
+                    data[offset // 8] >> (offset % 8) & 1
+                )
+            return payload[:4]
+
+        if functioncode == 16:
+            address, count = struct.unpack(">HH", payload[:4])
+            values = struct.unpack(f">{count}H", payload[5 : 5 + count * 2])
+            if any(
+                (3, address + offset) not in self.registers for offset in range(count)
+            ):
+                return 2
+            for offset, value in enumerate(values):
+                self.registers[(3, address + offset)] = value
+            return payload[:4]
+
+        return 1
+
+
+class SimulatedBus:
+    """Serial port lookalike answering Modbus RTU requests
+
+    Pass it to EpeverChargeController in place of the port name.
+    """
+
+    def __init__(self, controllers=None, device_baudrate=115200):
+        self.controllers = (
+            {1: SimulatedController()} if controllers is None else controllers
+        )
+        self.device_baudrate = device_baudrate
+        self.requests = []
+        self.port = "/dev/ttySIM0"
+        self.baudrate = 115200
+        self.timeout = 1
+        self.is_open = True
+        self._response = b""
+        self._lock = threading.Lock()
+
+    def open(self):
+        self.is_open = True
+
+    def close(self):
+        self.is_open = False
+
+    def reset_input_buffer(self):
+        self._response = b""
+
+    def reset_output_buffer(self):
+        pass
+
+    def flush(self):
+        pass
+
+    def write(self, request):
+        with self._lock:
+            self.requests.append(bytes(request))
+            self._response = self.respond(bytes(request))
+        return len(request)
+
+    def read(self, size):
+        with self._lock:
+            response, self._response = self._response[:size], self._response[size:]
+        return response
+
+    def readinto(self, buffer):
+        response = self.read(len(buffer))
+        buffer[: len(response)] = response
+        return len(response)
+
+    def respond(self, request):
+        if self.baudrate != self.device_baudrate:
+            return b""
+        if len(request) < 4 or crc16(request[:-2]) != request[-2:]:
+            return b""
+        slaveaddress, functioncode = request[0], request[1]
+        payload = request[2:-2]
+
+        if slaveaddress == 0:
+            for controller in self.controllers.values():
+                controller.handle(functioncode, payload)
+            return b""
+
+        controller = self.controllers.get(slaveaddress)
+        if controller is None:
+            return b""
+
+        result = controller.handle(functioncode, payload)
+        if isinstance(result, int):
+            frame = bytes([slaveaddress, functioncode | 0x80, result])
+        else:
+            frame = bytes([slaveaddress, functioncode]) + result
+        return frame + crc16(frame)
@@ -0,0 +1,97 @@
+import unittest
+
+from epevermodbus import (
+    DerivedMetrics,
+    EnergyIntegrator,
+    ExponentialMean,
+    SlidingExtremum,
+    WindowMean,
+)
+
+
+class EnergyIntegratorTestCase(unittest.TestCase):
+    def test_trapezoidal_integration(self):
+        integrator = EnergyIntegrator()
+
+        integrator.update(0, 100)
+        integrator.update(1800, 300)
+        energy = integrator.update(3600, 300)
+
+        self.assertAlmostEqual(energy, 100 + 150)
+
+    def test_gap_is_not_integrated(self):
+        integrator = EnergyIntegrator(max_gap=60)
+
+        integrator.update(0, 100)
+        integrator.update(3600, 100)
+        energy = integrator.update(3630, 100)
+
+        self.assertAlmostEqual(energy, 100 * 30 / 3600)
+
+
+class ExponentialMeanTestCase(unittest.TestCase):
+    def test_converges_to_constant_input(self):
+        mean = ExponentialMean(time_constant=10)
+
+        mean.update(0, 0)
+        for timestamp in range(1, 200):
+            value = mean.update(timestamp, 50)
+
+        self.assertAlmostEqual(value, 50, places=3)
+
+
+class WindowMeanTestCase(unittest.TestCase):
+    def test_returns_mean_when_window_completes(self):
+        mean = WindowMean(window=300)
+
+        self.assertIsNone(mean.update(0, 10))
+        self.assertIsNone(mean.update(150, 20))
+        self.assertEqual(mean.update(300, 100), 15)
+        self.assertEqual(mean.last_window_start, 0)
+        self.assertEqual(mean.mean, 100)
+
+
+class SlidingExtremumTestCase(unittest.TestCase):
+    def test_maximum_expires_with_window(self):
+        maximum = SlidingExtremum(window=10)
+
+        self.assertEqual(maximum.update(0, 5), 5)
+        self.assertEqual(maximum.update(5, 3), 5)
+        self.assertEqual(maximum.update(10, 1), 3)
+        self.assertEqual(maximum.update(16, 2), 2)
+
+    def test_minimum(self):
+        minimum = SlidingExtremum(window=10, maximum=False)
+
+        minimum.update(0, 5)
+        minimum.update(1, 2)
+
+        self.assertEqual(minimum.update(2, 4), 2)
+
+    def test_fractional_window(self):
+        maximum = SlidingExtremum(window=0.5)
+
+        self.assertEqual(maximum.update(0.0, 5), 5)
+        self.assertEqual(maximum.update(0.3, 3), 5)
+        self.assertEqual(maximum.update(0.6, 1), 3)
+
+    def test_window_must_be_positive(self):
+        with self.assertRaises(ValueError):
+            SlidingExtremum(window=0)
+
+
+class DerivedMetricsTestCase(unittest.TestCase):
+    def test_update_from_readings(self):
+        metrics = DerivedMetrics(average_window=60, peak_window=60)
+
+        metrics.update({"solar_power": 100.0, "load_power": 10.0}, timestamp=0)
+        result = metrics.update(
+            {"solar_power": 200.0, "load_power": 10.0}, timestamp=36
+        )
+
+        self.assertAlmostEqual(result["solar_energy"], 1.5)
+        self.assertAlmostEqual(result["load_energy"], 0.1)
+        self.assertEqual(result["solar_power_maximum"], 200.0)
+        self.assertEqual(result["solar_power_minimum"], 100.0)
+        self.assertEqual(result["battery_energy"], 0.0)
+        self.assertIsNone(result["battery_power_maximum"])
@@ -0,0 +1,73 @@
+import os
+import tempfile
+import unittest
+
+import minimalmodbus
+
+from epevermodbus.capabilities import (
+    apply_capabilities,
+    device_key,
+    load_capabilities,
+    probe_unsupported_registers,
+)
+from epevermodbus.driver import REGISTER_BLOCKS, EpeverChargeController
+from test.simulator import SimulatedBus
+
+
+class CapabilitiesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.simulated = self.bus.controllers[1]
+        del self.simulated.registers[(4, 0x311B)]
+        del self.simulated.registers[(3, 0x9070)]
+        self.controller = EpeverChargeController(self.bus, 1)
+        self.controller.serial.timeout = 0.01
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "capabilities.json")
+
+    def test_illegal_address_is_not_retried(self):
+        with self.assertRaises(minimalmodbus.IllegalRequestError):
+            self.controller.get_remote_battery_temperature()
+
+        self.assertEqual(len(self.bus.requests), 1)
+
+    def test_bisects_to_unsupported_registers(self):
+        unsupported = probe_unsupported_registers(self.controller)
+
+        self.assertEqual(unsupported, {(4, 0x311B), (3, 0x9070)})
+
+    def test_device_key(self):
+        self.assertEqual(
+            device_key(self.controller), "EPsolar/Tracer2210AN/V02.13+V07.23"
+        )
+
+    def test_device_key_falls_back_to_rated_data(self):
+        self.simulated.identification = None
+
+        self.assertEqual(device_key(self.controller), "rated/12.0V/20.0A/PWM")
+
+    def test_block_reads_route_around_unsupported_registers(self):
+        key = apply_capabilities(self.controller, self.path)
+        self.bus.requests.clear()
+
+        registers = self.controller.read_register_blocks()
+
+        self.assertEqual(
+            load_capabilities(self.path), {key: {(4, 0x311B), (3, 0x9070)}}
+        )
+        self.assertNotIn((4, 0x311B), registers)
+        self.assertEqual(registers[(4, 0x311A)], 86)
+        self.assertNotIn((3, 0x9070), registers)
+        # The block holding only 0x9070 is skipped entirely
+        self.assertEqual(len(self.bus.requests), len(REGISTER_BLOCKS) - 1)
+
+    def test_stored_capabilities_are_not_probed_again(self):
+        apply_capabilities(self.controller, self.path)
+        self.bus.requests.clear()
+
+        other = EpeverChargeController(self.bus, 1)
+        apply_capabilities(other, self.path)
+
+        self.assertEqual(other.unsupported_registers, {(4, 0x311B), (3, 0x9070)})
+        self.assertEqual(len(self.bus.requests), 1)
@@ -0,0 +1,98 @@
+import contextlib
+import datetime
+import io
+import subprocess
+import sys
+import unittest
+
+from epevermodbus.command_line import (
+    build_parser,
+    parse_settings,
+    translate_legacy_arguments,
+)
+
+
+class TranslateLegacyArgumentsTestCase(unittest.TestCase):
+    def test_no_subcommand_reads(self):
+        argv = translate_legacy_arguments(["--portname", "/dev/ttyUSB1", "--json"])
+
+        self.assertEqual(argv, ["read", "--portname", "/dev/ttyUSB1", "--json"])
+
+    def test_set_options_become_set_command(self):
+        argv = translate_legacy_arguments(
+            [
+                "--set-time",
+                "--set-battery-capacity",
+                "40",
+                "--set-float-charging-voltage=13.6",
+            ]
+        )
+
+        self.assertEqual(
+            argv, ["set", "time", "battery_capacity=40", "float_charging_voltage=13.6"]
+        )
+
+    def test_json_is_dropped_from_set(self):
+        argv = translate_legacy_arguments(["--set-time", "--json"])
+
+        self.assertEqual(argv, ["set", "time"])
+        self.assertEqual(build_parser().parse_args(argv).settings, ["time"])
+
+    def test_subcommand_is_left_alone(self):
+        argv = translate_legacy_arguments(["watch", "--count", "1"])
+
+        self.assertEqual(argv, ["watch", "--count", "1"])
+
+
+class ImportTimeTestCase(unittest.TestCase):
+    def test_argument_parsing_does_not_import_driver_dependencies(self):
+        # Start-up benchmark guard: see benchmarks/import_time.py for timings
+        code = (
+            "import sys\n"
+            "from epevermodbus import command_line\n"
+            "command_line.build_parser().parse_args(['read', '--json'])\n"
+            "print(','.join(m for m in ('minimalmodbus', 'serial', 'retrying', 'json') if m in sys.modules))\n"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        ).stdout.strip()
+
+        self.assertEqual(output, "")
+
+    def test_parser_has_subcommands(self):
+        args = build_parser().parse_args(["scan", "--last", "10"])
+
+        self.assertEqual(args.command, "scan")
+        self.assertEqual(args.last, 10)
+
+
+class ParseSettingsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.parser = build_parser()
+
+    def test_values_are_parsed(self):
+        settings, _ = parse_settings(
+            self.parser,
+            [
+                "battery_capacity=40",
+                "float_charging_voltage=13.6",
+                "time=2021-08-09T14:30:15",
+            ],
+        )
+
+        self.assertEqual(settings["battery_capacity"], 40)
+        self.assertEqual(settings["float_charging_voltage"], 13.6)
+        self.assertEqual(settings["time"], datetime.datetime(2021, 8, 9, 14, 30, 15))
+
+    def test_invalid_values_are_parser_errors(self):
+        for setting in (
+            "battery_capacity=forty",
+            "float_charging_voltage=13,6",
+            "time=yesterday",
+        ):
+            with self.subTest(setting=setting), contextlib.redirect_stderr(
+                io.StringIO()
+            ) as stderr:
+                with self.assertRaises(SystemExit):
+                    parse_settings(self.parser, [setting])
+                self.assertIn("invalid value for", stderr.getvalue())
@@ -0,0 +1,188 @@
+import datetime
+import time
+import unittest
+
+from epevermodbus.driver import (
+    EpeverChargeController,
+    RegisterSnapshot,
+    blocks_for_fields,
+)
+from epevermodbus.fields import FIELDS
+from test.simulator import SimulatedBus
+
+
+class GetFieldsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.controller = EpeverChargeController(self.bus, 1)
+
+    def test_block_reads_match_single_getters(self):
+        expected = {
+            name: getattr(self.controller, getter)() for name, _, _, getter in FIELDS
+        }
+        self.bus.requests.clear()
+
+        values = self.controller.get_fields()
+
+        self.assertEqual(values, expected)
+        self.assertEqual(len(self.bus.requests), 16)
+
+    def test_only_needed_blocks_are_read(self):
+        values = self.controller.get_fields(["solar_voltage", "solar_power"])
+
+        self.assertEqual(values, {"solar_voltage": 18.5, "solar_power": 96.2})
+        self.assertEqual(len(self.bus.requests), 1)
+
+
+class RegisterSnapshotTestCase(unittest.TestCase):
+    def test_decodes_signed_and_long_values(self):
+        snapshot = RegisterSnapshot(
+            {
+                (4, 0x331B): 0xFF9C,
+                (4, 0x331C): 0xFFFF,
+                (4, 0x3111): 0xFF38,
+                (3, 0x9013): 30 << 8 | 15,
+                (3, 0x9014): 9 << 8 | 14,
+                (3, 0x9015): 21 << 8 | 8,
+            }
+        )
+
+        self.assertEqual(snapshot.get_battery_current(), -1.0)
+        self.assertEqual(snapshot.get_controller_temperature(), -2.0)
+        self.assertEqual(snapshot.get_rtc(), datetime.datetime(2021, 8, 9, 14, 30, 15))
+
+    def test_missing_register_is_not_retried(self):
+        with self.assertRaises(KeyError):
+            RegisterSnapshot({}).get_solar_voltage()
+
+    def test_blocks_for_fields(self):
+        self.assertEqual(
+            blocks_for_fields(["night_time", "day_time", "battery_capacity"]),
+            [(2, 0x200C, 1), (3, 0x9000, 15)],
+        )
+
+
+class BitsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.simulated = self.bus.controllers[1]
+        self.controller = EpeverChargeController(self.bus, 1)
+
+    def test_discrete_inputs_skip_unmapped_addresses(self):
+        self.simulated.registers[(2, 0x200C)] = 1
+
+        flags = self.controller.get_discrete_inputs()
+
+        self.assertEqual(flags, {"device_over_temperature": False, "night": True})
+        self.assertEqual(len(self.bus.requests), 2)
+
+    def test_coils_skip_unmapped_addresses(self):
+        coils = self.controller.get_coils()
+
+        self.assertTrue(coils["manual_load_on"])
+        self.assertFalse(coils["load_test_mode"])
+        self.assertEqual(len(self.bus.requests), 2)
+
+    def test_load_control_setters(self):
+        self.controller.set_manual_load_on(False)
+        self.controller.set_force_load_on(True)
+
+        self.assertEqual(self.simulated.registers[(1, 0x0002)], 0)
+        self.assertEqual(self.simulated.registers[(1, 0x0006)], 1)
+
+    def test_unknown_coil(self):
+        with self.assertRaises(TypeError):
+            self.controller.set_coil("lights", True)
+
+
+class GetSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.simulated = self.bus.controllers[1]
+        self.controller = EpeverChargeController(self.bus, 1)
+        self.controller.serial.timeout = 0.01
+
+    def test_failed_block_does_not_lose_other_fields(self):
+        del self.simulated.registers[(3, 0x9070)]
+
+        snapshot = self.controller.get_snapshot(["solar_voltage", "charging_mode"])
+
+        self.assertEqual(snapshot["solar_voltage"]["status"], "ok")
+        self.assertEqual(snapshot["solar_voltage"]["value"], 18.5)
+        self.assertIsNotNone(snapshot["solar_voltage"]["timestamp"])
+        self.assertEqual(snapshot["charging_mode"]["status"], "error")
+        self.assertIsNone(snapshot["charging_mode"]["value"])
+        self.assertIn("illegal data address", snapshot["charging_mode"]["error"])
+        # Illegal addresses are not retried
+        self.assertEqual(len(self.bus.requests), 2)
+
+    def test_only_failed_blocks_are_retried(self):
+        handle = self.simulated.handle
+        failures = iter([True, True])
+
+        def flaky(functioncode, payload):
+            if functioncode == 3 and next(failures, False):
+                return 4
+            return handle(functioncode, payload)
+
+        self.simulated.handle = flaky
+
+        snapshot = self.controller.get_snapshot(["solar_voltage", "battery_capacity"])
+
+        self.assertEqual(snapshot["battery_capacity"]["value"], 40)
+        self.assertEqual([request[1] for request in self.bus.requests], [3, 4, 3, 3])
+
+    def test_deadline(self):
+        self.simulated.handle = lambda functioncode, payload: 4
+
+        snapshot = self.controller.get_snapshot(["battery_capacity"], deadline=0.5)
+
+        self.assertEqual(snapshot["battery_capacity"]["status"], "error")
+        self.assertLessEqual(len(self.bus.requests), 3)
+
+    def test_unsupported_register(self):
+        self.controller.unsupported_registers = {(4, 0x311B)}
+
+        snapshot = self.controller.get_snapshot(
+            ["remote_battery_temperature", "battery_state_of_charge"]
+        )
+
+        self.assertEqual(
+            snapshot["remote_battery_temperature"]["status"], "unsupported"
+        )
+        self.assertEqual(snapshot["battery_state_of_charge"]["value"], 86)
+
+    def test_deadline_is_checked_before_every_block(self):
+        handle = self.simulated.handle
+
+        def slow(functioncode, payload):
+            time.sleep(0.3)
+            return handle(functioncode, payload)
+
+        self.simulated.handle = slow
+
+        snapshot = self.controller.get_snapshot(
+            ["solar_voltage", "battery_capacity", "charging_mode"], deadline=0.2
+        )
+
+        statuses = sorted(reading["status"] for reading in snapshot.values())
+        self.assertEqual(len(self.bus.requests), 1)
+        self.assertEqual(statuses, ["ok", "timeout", "timeout"])
+        self.assertTrue(
+            all(
+                reading["error"].startswith("Deadline")
+                for reading in snapshot.values()
+                if reading["error"]
+            )
+        )
+
+    def test_invalid_rtc_is_an_error(self):
+        self.simulated.registers[(3, 0x9015)] = 0
+
+        snapshot = self.controller.get_snapshot(["current_device_time"])
+
+        self.assertEqual(snapshot["current_device_time"]["status"], "error")
+        self.assertIsNone(snapshot["current_device_time"]["value"])
+        self.assertEqual(
+            snapshot["current_device_time"]["error"], "Device returned an invalid value"
+        )
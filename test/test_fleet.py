@@ -0,0 +1,181 @@
+import datetime
+import unittest
+
+from epevermodbus.driver import EpeverChargeController
+from epevermodbus.fleet import (
+    push_battery_voltage_control_registers,
+    run_per_port,
+    sync_rtcs,
+)
+from test.simulator import SimulatedBus, SimulatedController
+
+
+class RunPerPortTestCase(unittest.TestCase):
+    def test_results_and_errors_by_port_and_address(self):
+        first_bus = SimulatedBus({1: SimulatedController(), 2: SimulatedController()})
+        second_bus = SimulatedBus({1: SimulatedController()})
+        second_bus.port = "/dev/ttySIM1"
+        controllers = [
+            EpeverChargeController(first_bus, 1),
+            EpeverChargeController(first_bus, 2),
+            EpeverChargeController(second_bus, 1),
+            EpeverChargeController(second_bus, 3),
+        ]
+        for controller in controllers:
+            controller.serial.timeout = 0.01
+
+        results = run_per_port(
+            controllers, lambda controller: controller.read_register(0x9001, 0, 3)
+        )
+
+        self.assertEqual(results[("/dev/ttySIM0", 1)], 40)
+        self.assertEqual(results[("/dev/ttySIM0", 2)], 40)
+        self.assertEqual(results[("/dev/ttySIM1", 1)], 40)
+        self.assertIsInstance(results[("/dev/ttySIM1", 3)], IOError)
+
+
+class SyncRtcTestCase(unittest.TestCase):
+    def test_sync_writes_local_time_on_a_second_boundary(self):
+        bus = SimulatedBus()
+        controller = EpeverChargeController(bus, 1)
+
+        before = datetime.datetime.now()
+        result = sync_rtcs([controller])[("/dev/ttySIM0", 1)]
+
+        self.assertGreater(result["written"], before)
+        self.assertLessEqual(result["written"], before + datetime.timedelta(seconds=2))
+        self.assertEqual(result["written"].microsecond, 0)
+        self.assertEqual(controller.get_rtc(), result["written"])
+        self.assertIn(result["drift"], (-1, 0))
+        self.assertGreater(result["round_trip_time"], 0)
+
+    def test_units_on_one_bus_share_one_broadcast_write(self):
+        bus = SimulatedBus({address: SimulatedController() for address in (1, 2, 3)})
+        controllers = [EpeverChargeController(bus, address) for address in (1, 2, 3)]
+
+        results = sync_rtcs(controllers)
+
+        writes = [request for request in bus.requests if request[1] == 16]
+        self.assertEqual([write[0] for write in writes], [0])
+        written = {result["written"] for result in results.values()}
+        self.assertEqual(len(written), 1)
+        for controller, result in zip(controllers, results.values()):
+            self.assertEqual(controller.get_rtc(), result["written"])
+            self.assertIn(result["drift"], (-1, 0))
+
+
+class PushBatteryVoltageControlRegistersTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus(
+            {address: SimulatedController() for address in (1, 2, 3)}
+        )
+        self.controllers = [
+            EpeverChargeController(self.bus, address) for address in (1, 2, 3)
+        ]
+
+    def test_broadcast_writes_once_and_verifies_each_unit(self):
+        results = push_battery_voltage_control_registers(
+            self.controllers, {"float_charging_voltage": 13.5}, broadcast=True
+        )
+
+        self.assertEqual(
+            results, {("/dev/ttySIM0", address): {} for address in (1, 2, 3)}
+        )
+        writes = [request for request in self.bus.requests if request[1] == 16]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(writes[0][0], 0)
+        for controller in self.bus.controllers.values():
+            self.assertEqual(controller.registers[(3, 0x9008)], 1350)
+
+    def test_full_profile_is_broadcast_without_reading_first(self):
+        profile = self.controllers[0].get_battery_voltage_control_registers()
+        profile["float_charging_voltage"] = 13.5
+        self.bus.controllers[2].registers[(3, 0x9003)] = 3000
+        self.bus.requests.clear()
+
+        results = push_battery_voltage_control_registers(
+            self.controllers, profile, broadcast=True
+        )
+
+        self.assertEqual(
+            results, {("/dev/ttySIM0", address): {} for address in (1, 2, 3)}
+        )
+        # One broadcast write and one read back per unit
+        self.assertEqual(
+            [(request[0], request[1]) for request in self.bus.requests],
+            [(0, 16), (1, 3), (2, 3), (3, 3)],
+        )
+        self.assertEqual(self.bus.controllers[2].registers[(3, 0x9003)], 1470)
+
+    def test_mismatch_is_reported(self):
+        # Unit 2 ignores writes, as if it had rejected the broadcast
+        self.bus.controllers[
+            2
+        ].handle = lambda functioncode, payload, handle=self.bus.controllers[
+            2
+        ].handle: (
+            payload[:4] if functioncode == 16 else handle(functioncode, payload)
+        )
+
+        results = push_battery_voltage_control_registers(
+            self.controllers, {"float_charging_voltage": 13.5}, broadcast=True
+        )
+
+        self.assertEqual(
+            results[("/dev/ttySIM0", 2)], {"float_charging_voltage": (13.5, 13.6)}
+        )
+        self.assertEqual(results[("/dev/ttySIM0", 1)], {})
+
+    def test_unicast(self):
+        push_battery_voltage_control_registers(
+            self.controllers, {"float_charging_voltage": 13.5}
+        )
+
+        writes = [request for request in self.bus.requests if request[1] == 16]
+        self.assertEqual([write[0] for write in writes], [1, 2, 3])
+
+    def test_unicast_keeps_other_settings_of_each_unit(self):
+        self.bus.controllers[2].registers[(3, 0x9003)] = 3000
+
+        results = push_battery_voltage_control_registers(
+            self.controllers, {"float_charging_voltage": 13.5}
+        )
+
+        self.assertEqual(
+            results, {("/dev/ttySIM0", address): {} for address in (1, 2, 3)}
+        )
+        self.assertEqual(self.bus.controllers[2].registers[(3, 0x9003)], 3000)
+        self.assertEqual(self.bus.controllers[2].registers[(3, 0x9008)], 1350)
+        self.assertNotEqual(self.bus.controllers[1].registers[(3, 0x9003)], 3000)
+
+    def test_broadcast_falls_back_to_unicast_when_units_differ(self):
+        self.bus.controllers[2].registers[(3, 0x9003)] = 3000
+
+        results = push_battery_voltage_control_registers(
+            self.controllers, {"float_charging_voltage": 13.5}, broadcast=True
+        )
+
+        self.assertEqual(
+            results, {("/dev/ttySIM0", address): {} for address in (1, 2, 3)}
+        )
+        writes = [request for request in self.bus.requests if request[1] == 16]
+        self.assertEqual([write[0] for write in writes], [1, 2, 3])
+        self.assertEqual(self.bus.controllers[2].registers[(3, 0x9003)], 3000)
+
+    def test_offline_unit_does_not_stop_the_others(self):
+        del self.bus.controllers[2]
+        for controller in self.controllers:
+            controller.serial.timeout = 0.01
+
+        results = push_battery_voltage_control_registers(
+            self.controllers, {"float_charging_voltage": 13.5}
+        )
+
+        self.assertIsInstance(results[("/dev/ttySIM0", 2)], IOError)
+        self.assertEqual(results[("/dev/ttySIM0", 1)], {})
+        self.assertEqual(results[("/dev/ttySIM0", 3)], {})
+        self.assertEqual(self.bus.controllers[3].registers[(3, 0x9008)], 1350)
+
+    def test_unknown_register(self):
+        with self.assertRaises(TypeError):
+            push_battery_voltage_control_registers(self.controllers, {"charge": 1})
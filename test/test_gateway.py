@@ -0,0 +1,118 @@
+import socket
+import struct
+import threading
+import time
+import unittest
+
+from epevermodbus.driver import EpeverChargeController
+from epevermodbus.gateway import ModbusTcpGateway
+from test.simulator import SimulatedBus
+
+
+class ModbusTcpGatewayTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.simulated = self.bus.controllers[1]
+        self.gateway = ModbusTcpGateway(
+            ("127.0.0.1", 0), [EpeverChargeController(self.bus, 1)], interval=60
+        )
+        self.gateway.serve_in_background()
+        self.addCleanup(self.gateway.server_close)
+        self.addCleanup(self.gateway.shutdown)
+        self.client = socket.create_connection(self.gateway.server_address)
+        self.addCleanup(self.client.close)
+
+    def request(self, pdu, unit_id=1):
+        self.client.sendall(struct.pack(">HHHB", 7, 0, len(pdu) + 1, unit_id) + pdu)
+        transaction_id, _, length, _ = struct.unpack(">HHHB", self.client.recv(7))
+        self.assertEqual(transaction_id, 7)
+        return self.client.recv(length - 1)
+
+    def test_reads_are_served_from_mirror(self):
+        requests = len(self.bus.requests)
+
+        for _ in range(3):
+            response = self.request(struct.pack(">BHH", 4, 0x3100, 2))
+            self.assertEqual(response, struct.pack(">BBHH", 4, 4, 1850, 520))
+
+        self.assertEqual(len(self.bus.requests), requests)
+
+    def test_read_bits(self):
+        response = self.request(struct.pack(">BHH", 1, 0x0000, 4))
+
+        self.assertEqual(response, bytes([1, 1, 0b100]))
+
+    def test_unmirrored_address(self):
+        response = self.request(struct.pack(">BHH", 3, 0x9100, 1))
+
+        self.assertEqual(response, bytes([0x83, 2]))
+
+    def test_write_passes_through_and_refreshes_mirror(self):
+        response = self.request(struct.pack(">BHH", 6, 0x9001, 100))
+
+        self.assertEqual(response, struct.pack(">BHH", 6, 0x9001, 100))
+        self.assertEqual(self.simulated.registers[(3, 0x9001)], 100)
+        response = self.request(struct.pack(">BHH", 3, 0x9001, 1))
+        self.assertEqual(response, struct.pack(">BBH", 3, 2, 100))
+
+    def test_write_multiple_registers(self):
+        pdu = struct.pack(">BHHB2H", 16, 0x9008, 2, 4, 1350, 1320)
+
+        self.request(pdu)
+
+        self.assertEqual(self.simulated.registers[(3, 0x9008)], 1350)
+        self.assertEqual(self.simulated.registers[(3, 0x9009)], 1320)
+
+    def test_write_coil(self):
+        self.request(struct.pack(">BHH", 5, 0x0006, 0xFF00))
+
+        self.assertEqual(self.simulated.registers[(1, 0x0006)], 1)
+
+    def test_unknown_unit(self):
+        response = self.request(struct.pack(">BHH", 3, 0x9001, 1), unit_id=9)
+
+        self.assertEqual(response, bytes([0x83, 0x0B]))
+
+    def test_stale_block_is_not_served(self):
+        self.gateway.read_times[(1, (4, 0x3100, 8))] = time.monotonic() - 1000
+
+        response = self.request(struct.pack(">BHH", 4, 0x3100, 2))
+
+        self.assertEqual(response, bytes([0x84, 0x0B]))
+
+    def test_poll_started_before_write_does_not_undo_it(self):
+        controller = self.gateway.controllers[1]
+        read_register_blocks = controller.read_register_blocks
+        polled = threading.Event()
+        written = threading.Event()
+
+        def slow_poll(blocks):
+            registers = read_register_blocks(blocks)
+            if not polled.is_set():
+                polled.set()
+                written.wait(1)
+            return registers
+
+        controller.read_register_blocks = slow_poll
+        poll = threading.Thread(target=self.gateway._refresh, args=(1, (3, 0x9000, 15)))
+        poll.start()
+        polled.wait(1)
+        self.request(struct.pack(">BHH", 6, 0x9001, 100))
+        written.set()
+        poll.join()
+
+        response = self.request(struct.pack(">BHH", 3, 0x9001, 1))
+        self.assertEqual(response, struct.pack(">BBH", 3, 2, 100))
+
+    def test_unexpected_error_is_a_device_failure(self):
+        def fail(unit_id, functioncode, data):
+            raise RuntimeError("unexpected")
+
+        handle_pdu = self.gateway.handle_pdu
+        self.gateway.handle_pdu = fail
+        response = self.request(struct.pack(">BHH", 3, 0x9001, 1))
+        self.gateway.handle_pdu = handle_pdu
+
+        self.assertEqual(response, bytes([0x83, 0x04]))
+        response = self.request(struct.pack(">BHH", 3, 0x9001, 1))
+        self.assertEqual(response, struct.pack(">BBH", 3, 2, 40))
@@ -0,0 +1,140 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import struct
+import tempfile
+import unittest
+
+import minimalmodbus
+
+from epevermodbus.command_line import main
+from epevermodbus.driver import EpeverChargeController
+from epevermodbus.fields import FIELD_NAMES
+from epevermodbus.gateway import ModbusTcpGateway
+from epevermodbus.recording import ReplayController, load_recording, record_forever
+from test.simulator import SimulatedBus
+
+
+class RecordingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.simulated = self.bus.controllers[1]
+        self.controller = EpeverChargeController(self.bus, 1)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "recording.jsonl")
+
+    def record(self, count=1):
+        with open(self.path, "a") as file:
+            record_forever(self.controller, file, interval=0, count=count)
+
+    def test_replay_decodes_like_live_reads(self):
+        self.record()
+
+        replay = ReplayController(load_recording(self.path))
+
+        self.assertEqual(
+            replay.get_fields(FIELD_NAMES), self.controller.get_fields(FIELD_NAMES)
+        )
+
+    def test_get_snapshot_steps_through_recording(self):
+        self.record()
+        self.simulated.registers[(4, 0x331A)] = 1200
+        self.record()
+        replay = ReplayController(load_recording(self.path))
+
+        first = replay.get_snapshot(["battery_voltage"])
+        second = replay.get_snapshot(["battery_voltage"])
+
+        self.assertEqual(first["battery_voltage"]["value"], 13.3)
+        self.assertEqual(second["battery_voltage"]["value"], 12.0)
+        self.assertEqual(second["battery_voltage"]["timestamp"], replay.timestamp)
+        with self.assertRaises(EOFError):
+            replay.get_snapshot(["battery_voltage"])
+
+    def test_missing_register_is_an_error(self):
+        del self.simulated.registers[(3, 0x9070)]
+        self.record()
+        replay = ReplayController(load_recording(self.path))
+
+        snapshot = replay.get_snapshot(["solar_voltage", "charging_mode"])
+
+        self.assertEqual(snapshot["solar_voltage"]["status"], "ok")
+        self.assertEqual(snapshot["charging_mode"]["status"], "error")
+        self.assertIn("not in the recording", snapshot["charging_mode"]["error"])
+
+    def test_read_from_file(self):
+        self.record()
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            main(
+                [
+                    "read",
+                    "--from-file",
+                    self.path,
+                    "--json",
+                    "solar_voltage",
+                    "battery_capacity",
+                ]
+            )
+
+        self.assertEqual(
+            json.loads(output.getvalue()),
+            {"solar_voltage": 18.5, "battery_capacity": 40},
+        )
+
+    def test_watch_replay_stops_at_end(self):
+        self.record(count=3)
+        output = io.StringIO()
+
+        with contextlib.redirect_stdout(output):
+            main(
+                [
+                    "watch",
+                    "--replay",
+                    self.path,
+                    "--interval",
+                    "0",
+                    "--json",
+                    "battery_voltage",
+                ]
+            )
+
+        self.assertEqual(len(output.getvalue().splitlines()), 3)
+
+    def test_offline_options_are_for_read_and_watch_only(self):
+        self.record()
+
+        for command in (
+            ["set", "battery_capacity=100"],
+            ["serve"],
+            ["publish"],
+            ["gateway"],
+            ["record", "--output", "x"],
+        ):
+            with self.subTest(command=command[0]):
+                with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(
+                    SystemExit
+                ):
+                    main(command + ["--replay", self.path])
+
+    def test_writes_to_a_recording_are_refused(self):
+        self.record()
+        replay = ReplayController(load_recording(self.path))
+
+        with self.assertRaises(minimalmodbus.IllegalRequestError):
+            replay.set_battery_capacity(100)
+
+        gateway = ModbusTcpGateway(("127.0.0.1", 0), [replay], interval=60)
+        gateway.serve_in_background()
+        self.addCleanup(gateway.server_close)
+        self.addCleanup(gateway.shutdown)
+        client = socket.create_connection(gateway.server_address)
+        self.addCleanup(client.close)
+        pdu = struct.pack(">BHH", 6, 0x9001, 100)
+        client.sendall(struct.pack(">HHHB", 1, 0, len(pdu) + 1, 1) + pdu)
+
+        self.assertEqual(client.recv(64)[7:], bytes([0x86, 0x02]))
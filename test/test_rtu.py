@@ -0,0 +1,94 @@
+import time
+import unittest
+
+import minimalmodbus
+
+from epevermodbus.driver import EpeverChargeController
+from epevermodbus.rtu import RtuTransport, crc16, silent_period
+from test import test_driver
+from test.simulator import SimulatedBus
+from test.simulator import crc16 as reference_crc16
+
+
+class BuiltinRtuMixin:
+    def setUp(self):
+        super().setUp()
+        self.controller.rtu = RtuTransport(self.bus, (1,))
+
+
+class BuiltinRtuGetFieldsTestCase(BuiltinRtuMixin, test_driver.GetFieldsTestCase):
+    pass
+
+
+class BuiltinRtuBitsTestCase(BuiltinRtuMixin, test_driver.BitsTestCase):
+    pass
+
+
+class BuiltinRtuGetSnapshotTestCase(BuiltinRtuMixin, test_driver.GetSnapshotTestCase):
+    pass
+
+
+class RtuTransportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.controller = EpeverChargeController(self.bus, 1, builtin_rtu=True)
+        self.reference = EpeverChargeController(self.bus, 1)
+
+    def test_crc_matches_reference(self):
+        for data in (b"\x01\x04\x31\x00\x00\x08", bytes(range(256)), b""):
+            self.assertEqual(crc16(data).to_bytes(2, "little"), reference_crc16(data))
+
+    def test_silent_period(self):
+        self.assertAlmostEqual(silent_period(9600), 38.5 / 9600)
+        self.assertEqual(silent_period(115200), 0.00175)
+
+    def test_writes_wait_for_the_silent_period(self):
+        self.bus.baudrate = self.bus.device_baudrate = 1200
+        self.controller.read_registers(0x9000, 1, 3)
+        started = time.monotonic()
+        self.controller.write_register(0x9000, 1, functioncode=6)
+
+        self.assertGreaterEqual(time.monotonic() - started, 0.9 * silent_period(1200))
+        self.assertIsNotNone(self.controller.roundtrip_time)
+
+    def test_frames_match_minimalmodbus(self):
+        self.reference.read_registers(0x3100, 8, 4)
+        self.controller.read_registers(0x3100, 8, 4)
+
+        self.assertEqual(self.bus.requests[0], self.bus.requests[1])
+
+    def test_reads_match_minimalmodbus(self):
+        self.assertEqual(
+            self.controller.read_registers(0x9000, 15, 3),
+            self.reference.read_registers(0x9000, 15, 3),
+        )
+        self.assertEqual(
+            self.controller.read_bits(0x0000, 4, 1),
+            self.reference.read_bits(0x0000, 4, 1),
+        )
+        self.assertEqual(
+            self.controller.read_long(
+                0x3302, 4, False, minimalmodbus.BYTEORDER_LITTLE_SWAP
+            ),
+            self.reference.read_long(
+                0x3302, 4, False, minimalmodbus.BYTEORDER_LITTLE_SWAP
+            ),
+        )
+        self.assertIsNotNone(self.controller.roundtrip_time)
+
+    def test_no_response(self):
+        self.controller.address = 2
+
+        with self.assertRaises(minimalmodbus.NoResponseError):
+            self.controller.read_registers(0x3100, 8, 4)
+
+    def test_corrupted_response(self):
+        respond = self.bus.respond
+        self.bus.respond = lambda request: respond(request)[:-1] + b"\x00"
+
+        with self.assertRaises(minimalmodbus.InvalidResponseError):
+            self.controller.read_registers(0x3100, 8, 4)
+
+    def test_illegal_address(self):
+        with self.assertRaises(minimalmodbus.IllegalRequestError):
+            self.controller.read_registers(0x5000, 1, 4)
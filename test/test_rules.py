@@ -0,0 +1,133 @@
+import unittest
+
+from epevermodbus.driver import EpeverChargeController
+from epevermodbus.rules import Rule, RuleEngine
+from test.simulator import DEFAULT_REGISTERS, SimulatedBus
+
+
+class RuleTestCase(unittest.TestCase):
+    def test_hold_time(self):
+        rule = Rule("low", "battery_voltage", "<", 12.0, hold=60)
+
+        self.assertFalse(rule.update(11.5, 12.0, 0))
+        self.assertFalse(rule.update(11.5, 12.0, 59))
+        self.assertTrue(rule.update(11.5, 12.0, 60))
+        self.assertTrue(rule.active)
+
+    def test_hold_restarts_when_condition_breaks(self):
+        rule = Rule("low", "battery_voltage", "<", 12.0, hold=60)
+
+        rule.update(11.5, 12.0, 0)
+        rule.update(12.5, 12.0, 30)
+        self.assertFalse(rule.update(11.5, 12.0, 70))
+        self.assertTrue(rule.update(11.5, 12.0, 130))
+
+    def test_hysteresis(self):
+        rule = Rule("hot", "controller_temperature", ">", 70, hysteresis=5)
+
+        self.assertTrue(rule.update(71, 70, 0))
+        self.assertFalse(rule.update(66, 70, 1))
+        self.assertTrue(rule.update(65, 70, 2))
+        self.assertFalse(rule.active)
+
+    def test_unknown_names(self):
+        with self.assertRaises(ValueError):
+            Rule("x", "voltage", "<", 12)
+        with self.assertRaises(ValueError):
+            Rule("x", "battery_voltage", "<", "warning_voltage")
+        with self.assertRaises(ValueError):
+            Rule("x", "battery_voltage", "==", 12)
+
+
+class RuleEngineTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.simulated = self.bus.controllers[1]
+        self.controller = EpeverChargeController(self.bus, 1)
+        self.transitions = []
+        self.engine = RuleEngine(
+            [
+                Rule(
+                    "low battery",
+                    "battery_voltage",
+                    "<",
+                    "under_voltage_warning_voltage",
+                    hold=60,
+                ),
+                Rule("hot", "controller_temperature", ">", 70, hysteresis=5),
+            ],
+            callback=lambda rule, active, value, timestamp: self.transitions.append(
+                (rule.name, active, value)
+            ),
+        )
+        self.engine.load_settings(self.controller)
+        self.registers = self.controller.read_register_blocks(self.engine.blocks)
+
+    def test_setting_threshold_and_transitions(self):
+        warning_voltage = self.engine.settings["under_voltage_warning_voltage"]
+        self.assertEqual(warning_voltage, DEFAULT_REGISTERS[(3, 0x900C)] / 100)
+        low = dict(self.registers)
+        low[(4, 0x331A)] = int(warning_voltage * 100) - 10
+
+        self.engine.evaluate(low, 0)
+        self.engine.evaluate(low, 30)
+        self.assertEqual(self.transitions, [])
+        self.engine.evaluate(low, 60)
+        self.engine.evaluate(low, 90)
+        self.engine.evaluate(self.registers, 100)
+
+        self.assertEqual(
+            self.transitions,
+            [
+                ("low battery", True, warning_voltage - 0.1),
+                ("low battery", False, self.registers[(4, 0x331A)] / 100),
+            ],
+        )
+
+    def test_settings_updated_from_snapshot(self):
+        registers = dict(self.registers)
+        registers[(3, 0x900C)] = 1000
+
+        self.engine.evaluate(registers, 0)
+
+        self.assertEqual(self.engine.settings["under_voltage_warning_voltage"], 10.0)
+
+    def test_no_bus_reads(self):
+        self.bus.requests.clear()
+
+        for timestamp in range(10):
+            self.engine.evaluate(self.registers, timestamp)
+
+        self.assertEqual(self.bus.requests, [])
+
+    def test_missing_field_keeps_state(self):
+        registers = {
+            key: value for key, value in self.registers.items() if key != (4, 0x3111)
+        }
+
+        self.assertEqual(self.engine.evaluate(registers, 0), [])
+
+    def test_poll(self):
+        self.simulated.registers[(4, 0x3111)] = 7500
+
+        transitions = self.engine.poll(self.controller, 0)
+
+        self.assertEqual([rule.name for rule in transitions], ["hot"])
+        self.assertEqual(self.transitions, [("hot", True, 75.0)])
+
+    def test_unsupported_setting_is_loaded_once(self):
+        self.controller.unsupported_registers = {(3, 0x900C)}
+        engine = RuleEngine(
+            [Rule("low", "battery_voltage", "<", "under_voltage_warning_voltage")]
+        )
+
+        engine.poll(self.controller, 0)
+        requests = len(self.bus.requests)
+        engine.poll(self.controller, 1)
+        engine.poll(self.controller, 2)
+
+        self.assertEqual(engine.settings, {})
+        holding_reads = [
+            request for request in self.bus.requests[requests:] if request[1] == 3
+        ]
+        self.assertEqual(holding_reads, [])
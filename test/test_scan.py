@@ -0,0 +1,62 @@
+import unittest
+
+from epevermodbus.scan import scan, scan_port
+from test.simulator import SimulatedBus, SimulatedController
+
+
+class ScanPortTestCase(unittest.TestCase):
+    def test_finds_baudrate_and_addresses(self):
+        bus = SimulatedBus(
+            {3: SimulatedController(), 5: SimulatedController()}, device_baudrate=9600
+        )
+
+        found = scan_port(
+            bus, baudrates=(115200, 9600, 19200), timeout=0.001, max_misses=4
+        )
+
+        self.assertEqual(
+            [(c["baudrate"], c["slaveaddress"]) for c in found], [(9600, 3), (9600, 5)]
+        )
+        self.assertEqual(found[0]["port"], "/dev/ttySIM0")
+        self.assertEqual(found[0]["battery_rated_voltage"], 12.0)
+        self.assertEqual(found[0]["rated_charging_current"], 20.0)
+        self.assertEqual(found[0]["rated_charging_mode"], "PWM")
+        # 115200 finds nothing so sweeps every address, 9600 stops 4 misses
+        # after address 5, and 19200 is never tried
+        self.assertEqual(len(bus.requests), 247 + 9)
+
+    def test_full_sweep(self):
+        bus = SimulatedBus({200: SimulatedController()})
+
+        found = scan_port(bus, baudrates=(115200,), timeout=0.001, max_misses=None)
+
+        self.assertEqual([c["slaveaddress"] for c in found], [200])
+        self.assertEqual(len(bus.requests), 247)
+
+    def test_lone_high_address_is_found_by_default(self):
+        bus = SimulatedBus({20: SimulatedController()})
+
+        found = scan_port(bus, baudrates=(115200,), timeout=0.001)
+
+        self.assertEqual([c["slaveaddress"] for c in found], [20])
+        self.assertEqual(len(bus.requests), 20 + 16)
+
+    def test_sweep_stops_after_max_misses_by_default(self):
+        bus = SimulatedBus({1: SimulatedController(), 30: SimulatedController()})
+
+        found = scan_port(bus, baudrates=(115200,), timeout=0.001)
+
+        self.assertEqual([c["slaveaddress"] for c in found], [1])
+        self.assertEqual(len(bus.requests), 1 + 16)
+
+    def test_gap_wider_than_max_misses_is_swept_in_full_sweep(self):
+        bus = SimulatedBus({1: SimulatedController(), 30: SimulatedController()})
+
+        found = scan_port(bus, baudrates=(115200,), timeout=0.001, max_misses=None)
+
+        self.assertEqual([c["slaveaddress"] for c in found], [1, 30])
+
+
+class ScanTestCase(unittest.TestCase):
+    def test_ports_that_cannot_be_opened_are_skipped(self):
+        self.assertEqual(scan(["/dev/ttyDOESNOTEXIST"]), [])
@@ -0,0 +1,149 @@
+import threading
+import time
+import unittest
+
+from epevermodbus.driver import REGISTER_BLOCKS, EpeverChargeController
+from epevermodbus.scheduler import (
+    ALARM,
+    CONTROL,
+    REALTIME,
+    SETTINGS,
+    BusScheduler,
+    classify,
+)
+from test.simulator import SimulatedBus
+
+
+class ClassifyTestCase(unittest.TestCase):
+    def test_classes(self):
+        self.assertEqual(classify(16, 0x9003), CONTROL)
+        self.assertEqual(classify(5, 0x0002), CONTROL)
+        self.assertEqual(classify(4, 0x3201), ALARM)
+        self.assertEqual(classify(4, 0x3100), REALTIME)
+        self.assertEqual(classify(2, 0x2000), REALTIME)
+        self.assertEqual(classify(3, 0x9000), SETTINGS)
+
+    def test_priority_override(self):
+        scheduler = BusScheduler()
+
+        with scheduler.priority(ALARM):
+            self.assertEqual(scheduler.priority_for(3, 0x9000), ALARM)
+        self.assertEqual(scheduler.priority_for(3, 0x9000), SETTINGS)
+
+
+class BusSchedulerTestCase(unittest.TestCase):
+    def test_most_urgent_waiter_goes_first(self):
+        scheduler = BusScheduler()
+        order = []
+
+        def transaction(priority):
+            with scheduler.transaction(priority):
+                order.append(priority)
+
+        with scheduler.transaction(REALTIME):
+            threads = []
+            for priority in (SETTINGS, REALTIME, CONTROL, ALARM):
+                thread = threading.Thread(target=transaction, args=(priority,))
+                thread.start()
+                threads.append(thread)
+                while len(scheduler._waiting) < len(threads):
+                    time.sleep(0.001)
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, [CONTROL, ALARM, REALTIME, SETTINGS])
+        self.assertEqual(scheduler.statistics[CONTROL]["count"], 1)
+
+    def test_settings_are_not_starved(self):
+        scheduler = BusScheduler(aging=0.05)
+        stop = threading.Event()
+        served = []
+
+        def realtime():
+            while not stop.is_set():
+                with scheduler.transaction(REALTIME):
+                    time.sleep(0.005)
+
+        def settings():
+            with scheduler.transaction(SETTINGS):
+                served.append(time.monotonic())
+
+        threads = [threading.Thread(target=realtime) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.02)
+        started = time.monotonic()
+        waiter = threading.Thread(target=settings)
+        waiter.start()
+        waiter.join(timeout=2)
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(served), 1)
+        self.assertLess(served[0] - started, 0.5)
+
+    def test_read_modify_write_is_control(self):
+        bus = SimulatedBus()
+        scheduler = BusScheduler()
+        controller = EpeverChargeController(bus, 1, scheduler=scheduler)
+
+        controller.set_battery_voltage_control_registers(charging_limit_voltage=14.4)
+
+        self.assertEqual(scheduler.statistics[CONTROL]["count"], 2)
+        self.assertEqual(scheduler.statistics[SETTINGS]["count"], 0)
+
+    def test_sync_rtc_holds_the_bus(self):
+        bus = SimulatedBus()
+        respond = bus.respond
+
+        def slow_respond(request):
+            time.sleep(0.002)
+            return respond(request)
+
+        bus.respond = slow_respond
+        scheduler = BusScheduler()
+        poller = EpeverChargeController(bus, 1, scheduler=scheduler)
+        controller = EpeverChargeController(bus, 1, scheduler=scheduler)
+        stop = threading.Event()
+
+        def poll():
+            while not stop.is_set():
+                poller.read_registers(0x3100, 8, 4)
+
+        thread = threading.Thread(target=poll)
+        thread.start()
+        try:
+            controller.sync_rtc()
+        finally:
+            stop.set()
+            thread.join()
+
+        functioncodes = [request[1] for request in bus.requests]
+        first = functioncodes.index(3)
+        self.assertEqual(functioncodes[first : first + 3], [3, 16, 3])
+
+    def test_control_write_preempts_sweep(self):
+        bus = SimulatedBus()
+        respond = bus.respond
+
+        def slow_respond(request):
+            time.sleep(0.01)
+            return respond(request)
+
+        bus.respond = slow_respond
+        scheduler = BusScheduler()
+        poller = EpeverChargeController(bus, 1, scheduler=scheduler)
+        controller = EpeverChargeController(bus, 1, scheduler=scheduler)
+
+        sweep = threading.Thread(target=poller.read_register_blocks)
+        sweep.start()
+        while len(bus.requests) < 2:
+            time.sleep(0.001)
+        controller.set_manual_load_on(False)
+        sweep.join()
+
+        functioncodes = [request[1] for request in bus.requests]
+        self.assertLessEqual(functioncodes.index(5), 3)
+        self.assertEqual(len(functioncodes), len(REGISTER_BLOCKS) + 1)
+        self.assertEqual(bus.controllers[1].registers[(1, 0x0002)], 0)
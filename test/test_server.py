@@ -0,0 +1,117 @@
+import json
+import threading
+import unittest
+import urllib.error
+import urllib.request
+
+from epevermodbus.cache import RegisterCache
+from epevermodbus.driver import EpeverChargeController
+from epevermodbus.server import SnapshotServer
+from test.simulator import SimulatedBus
+
+
+class RegisterCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.controller = EpeverChargeController(self.bus, 1)
+
+    def test_concurrent_requests_coalesce(self):
+        cache = RegisterCache(self.controller, max_age=60, coalesce_window=0.05)
+        results = []
+        threads = [
+            threading.Thread(
+                target=lambda: results.append(
+                    cache.get_fields(["solar_voltage", "battery_voltage"])
+                )
+            )
+            for _ in range(10)
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual(len(self.bus.requests), 2)
+
+    def test_stale_blocks_are_reread(self):
+        cache = RegisterCache(self.controller, max_age=0, coalesce_window=0)
+
+        cache.get_fields(["solar_voltage"])
+        cache.get_fields(["solar_voltage"])
+
+        self.assertEqual(len(self.bus.requests), 2)
+
+    def test_invalidate(self):
+        cache = RegisterCache(self.controller, max_age=60, coalesce_window=0)
+
+        cache.get_fields(["battery_capacity"])
+        self.bus.controllers[1].registers[(3, 0x9001)] = 100
+        cache.invalidate()
+
+        self.assertEqual(
+            cache.get_fields(["battery_capacity"]), {"battery_capacity": 100}
+        )
+
+    def test_unsupported_fields_are_left_out(self):
+        self.controller.unsupported_registers = {(4, 0x311B)}
+        cache = RegisterCache(self.controller, max_age=60, coalesce_window=0)
+
+        fields = cache.get_fields(
+            ["battery_state_of_charge", "remote_battery_temperature"]
+        )
+
+        self.assertEqual(fields, {"battery_state_of_charge": 86})
+
+
+class SnapshotServerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.bus = SimulatedBus()
+        self.server = SnapshotServer(
+            ("127.0.0.1", 0), EpeverChargeController(self.bus, 1), max_age=60
+        )
+        self.server.serve_in_background()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def get(self, path):
+        with urllib.request.urlopen(self.url + path) as response:
+            return json.load(response)
+
+    def test_snapshot(self):
+        snapshot = self.get("/snapshot")
+
+        self.assertEqual(snapshot["solar_voltage"], 18.5)
+        self.assertEqual(snapshot["current_device_time"], "2021-08-09T14:30:15")
+
+    def test_field_is_served_from_cache(self):
+        self.get("/snapshot?fields=battery_voltage")
+        requests = len(self.bus.requests)
+
+        self.assertEqual(self.get("/fields/battery_voltage"), {"battery_voltage": 13.3})
+        self.assertEqual(len(self.bus.requests), requests)
+
+    def test_capability_hole(self):
+        self.server.cache.controller.unsupported_registers = {(4, 0x311B)}
+
+        snapshot = self.get("/snapshot")
+
+        self.assertEqual(snapshot["battery_voltage"], 13.3)
+        self.assertIsNone(snapshot["remote_battery_temperature"])
+        self.assertEqual(
+            snapshot["errors"],
+            {"remote_battery_temperature": "Register not supported by this device"},
+        )
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.get("/fields/remote_battery_temperature")
+        self.assertEqual(context.exception.code, 404)
+
+    def test_unknown_field(self):
+        with self.assertRaises(urllib.error.HTTPError) as context:
+            self.get("/fields/nothing")
+
+        self.assertEqual(context.exception.code, 404)
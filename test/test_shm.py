@@ -0,0 +1,122 @@
+import os
+import struct
+import tempfile
+import unittest
+
+from epevermodbus.driver import REGISTER_BLOCKS, EpeverChargeController
+from epevermodbus.shm import SnapshotPublisher, SnapshotReader
+from test.simulator import SimulatedBus
+
+
+class SharedSnapshotTestCase(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "snapshot")
+        self.controller = EpeverChargeController(SimulatedBus(), 1)
+        self.publisher = SnapshotPublisher(self.path)
+        self.addCleanup(self.publisher.close)
+
+    def test_reader_sees_published_registers(self):
+        registers = self.controller.read_register_blocks()
+        self.publisher.publish(registers, 1234.5)
+
+        reader = SnapshotReader(self.path)
+        self.addCleanup(reader.close)
+        read_times, read_registers = reader.read()
+
+        self.assertEqual(read_registers, registers)
+        self.assertEqual(set(read_times.values()), {1234.5})
+        self.assertEqual(reader.blocks, list(REGISTER_BLOCKS))
+        self.assertEqual(reader.get_fields(["solar_power"]), {"solar_power": 96.2})
+
+    def test_unpublished_blocks_are_left_out(self):
+        self.publisher.publish(
+            self.controller.read_register_blocks([(4, 0x3100, 8)]), 1.0
+        )
+
+        reader = SnapshotReader(self.path)
+        self.addCleanup(reader.close)
+        read_times, _ = reader.read()
+
+        self.assertEqual(list(read_times), [(4, 0x3100, 8)])
+
+    def test_missing_registers_are_marked_invalid(self):
+        self.controller.unsupported_registers = {(4, 0x311B)}
+        registers = self.controller.read_register_blocks([(4, 0x311A, 2)])
+        self.publisher.publish(registers, 1.0)
+
+        reader = SnapshotReader(self.path)
+        self.addCleanup(reader.close)
+        read_times, read_registers = reader.read()
+        snapshot = reader.get_snapshot(
+            ["battery_state_of_charge", "remote_battery_temperature"]
+        )
+
+        self.assertEqual(list(read_times), [(4, 0x311A, 2)])
+        self.assertEqual(read_registers, {(4, 0x311A): 86})
+        self.assertEqual(snapshot["battery_state_of_charge"]["value"], 86)
+        self.assertEqual(
+            snapshot["remote_battery_temperature"]["status"], "unsupported"
+        )
+        self.assertEqual(
+            reader.get_fields(
+                ["battery_state_of_charge", "remote_battery_temperature"]
+            ),
+            {"battery_state_of_charge": 86},
+        )
+
+    def test_reader_does_not_return_during_write(self):
+        reader = SnapshotReader(self.path)
+        self.addCleanup(reader.close)
+        registers = self.controller.read_register_blocks([(4, 0x3100, 8)])
+        attempts = []
+
+        class ReadingRegisters(dict):
+            def get(self, key, default=None):
+                try:
+                    reader.read_raw(max_attempts=10)
+                    attempts.append("read")
+                except TimeoutError:
+                    attempts.append("timeout")
+                return super().get(key, default)
+
+        self.publisher.publish(ReadingRegisters(registers), 1.0)
+
+        self.assertEqual(set(attempts), {"timeout"})
+
+    def test_restarted_publisher_invalidates_attached_readers(self):
+        self.publisher.publish(self.controller.read_register_blocks(), 1.0)
+        reader = SnapshotReader(self.path)
+        self.addCleanup(reader.close)
+        sequence, _ = reader.read_raw()
+
+        restarted = SnapshotPublisher(self.path)
+        self.addCleanup(restarted.close)
+        restarted_sequence, _ = reader.read_raw()
+        read_times, registers = reader.read()
+
+        self.assertGreater(restarted_sequence, sequence)
+        self.assertEqual(restarted_sequence % 2, 0)
+        self.assertEqual((read_times, registers), ({}, {}))
+
+    def test_restart_with_other_blocks_is_detected(self):
+        self.publisher.publish(self.controller.read_register_blocks(), 1.0)
+        reader = SnapshotReader(self.path)
+        self.addCleanup(reader.close)
+
+        restarted = SnapshotPublisher(self.path, blocks=[(4, 0x3100, 8)])
+        self.addCleanup(restarted.close)
+
+        with self.assertRaises(ValueError):
+            reader.read()
+
+    def test_failed_publish_leaves_the_sequence_even(self):
+        reader = SnapshotReader(self.path)
+        self.addCleanup(reader.close)
+
+        with self.assertRaises(struct.error):
+            self.publisher.publish({(4, 0x3100): 0x10000}, 1.0)
+
+        sequence, _ = reader.read_raw(max_attempts=1)
+        self.assertEqual(sequence % 2, 0)